@@ -0,0 +1,36 @@
+"""Reconcile denormalized user counters with services, seekings and notifications"""
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from authentication.models import User
+from notifications.models import Notification
+from seeks.models import Seeking
+from services.models import Service
+
+# counter field: (model, user foreign key, counted rows filter)
+COUNTERS = {
+    'services_count': (Service, 'author', {}),
+    'seekings_count': (Seeking, 'author', {}),
+    'notifications_count': (Notification, 'recipient', {'notified': False}),
+}
+
+
+def count_rows(model, user_field, filters):
+    rows = model.objects.filter(**{user_field: OuterRef('pk')}, **filters).order_by()\
+        .values(user_field).annotate(count=Count('*')).values('count')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = 'Recounts services, seekings and notifications counters of users'
+
+    def handle(self, *args, **options):
+        for field, (model, user_field, filters) in COUNTERS.items():
+            # annotation names can't clash with the counter fields
+            actual = 'actual_{}'.format(field)
+            users = User.objects.annotate(**{actual: count_rows(model, user_field, filters)})\
+                .filter(~Q(**{field: F(actual)}))
+            updated = User.objects.filter(pk__in=users.values('pk'))\
+                .update(**{field: count_rows(model, user_field, filters)})
+            self.stdout.write('{}: {} users fixed'.format(field, updated))
@@ -0,0 +1,19 @@
+"""Recompute denormalized `User.email_verified`"""
+from allauth.account.models import EmailAddress
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+
+from authentication.models import User
+
+
+def verified_exists():
+    return Exists(EmailAddress.objects.filter(user=OuterRef('pk'), verified=True))
+
+
+class Command(BaseCommand):
+    help = 'Sets User.email_verified from allauth email addresses'
+
+    def handle(self, *args, **options):
+        updated = User.objects.exclude(email_verified=verified_exists())\
+            .update(email_verified=verified_exists())
+        self.stdout.write('{} users updated'.format(updated))
@@ -1,19 +1,21 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.core.cache import cache
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.http import HttpRequest
 from django.utils import timezone
 
 from django.conf import settings
 from allauth.account.models import EmailAddress
+from allauth.account.signals import email_confirmed
 from allauth.account.utils import send_email_confirmation
 from social_django.models import UserSocialAuth
 
 from django.urls import reverse
 
-from saas_core.images_compression import compress_image
+from saas_core.presence import get_presence
 
 
 def get_serialized_user_cache_key(user_id):
@@ -95,6 +97,17 @@ class User(AbstractUser):
     # additional fields
     last_active = models.DateTimeField(default=timezone.now)
 
+    # any verified allauth EmailAddress, kept in sync by signals below
+    email_verified = models.BooleanField(default=False)
+
+    # denormalized counters, see `update_users_counter`,
+    # never written by save(), fixed by `reconcile_user_counters`
+    services_count = models.IntegerField(default=0, editable=False)
+    seekings_count = models.IntegerField(default=0, editable=False)
+    # pending (not notified) notifications
+    notifications_count = models.IntegerField(default=0, editable=False)
+    COUNTER_FIELDS = ('services_count', 'seekings_count', 'notifications_count')
+
     bio = models.TextField(max_length=500, blank=True, null=True)
     phone = models.TextField(max_length=100, blank=True, null=True)
 
@@ -120,44 +133,29 @@ class User(AbstractUser):
     def get_absolute_url(self):
         return reverse('user-detail', args=[str(self.id)])
 
-    def get_online_status_cache_key(self):
-        return 'ONLINE_CHANNELS_COUNT_USER_{}'.format(self.id)
-
-    def set_online_status(self, is_online):
-        key = self.get_online_status_cache_key()
-        count = cache.get(key)
-        difference = 1 if is_online else -1
-
-        if count is None:
-            count = 0
-
-        new_count = count + difference
-
-        if new_count == 0:
-            cache.delete(key)
-            return None
-
-        cache.set(key, new_count)
-        return new_count
-
     @property
     def is_online(self):
-        cache_value = cache.get(self.get_online_status_cache_key())
-        return cache_value
+        return get_presence().is_online(self.id)
 
     @property
     def is_verified_email(self):
-        if self.is_staff:
-            return True
-        return EmailAddress.objects.filter(user=self, verified=True).exists()
-
-    def save(self, force_insert=False, force_update=False, *args, **kwargs):
+        return self.is_staff or self.email_verified
+
+    def sync_email_verified(self):
+        """Refresh `email_verified` from allauth email addresses"""
+        email_verified = EmailAddress.objects.filter(user=self, verified=True).exists()
+        if email_verified != self.email_verified:
+            self.email_verified = email_verified
+            # not save(), may run from inside of save() (email change)
+            User.objects.filter(pk=self.pk).update(email_verified=email_verified)
+            cache.delete(get_serialized_user_cache_key(self.pk))
+
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
         # invalidate cache
         cache.delete(get_serialized_user_cache_key(self.pk))
 
-        if not self.id or self.image != self.__original_image:
-            # image update.
-            self.image = compress_image(self.image)
+        # image update, compressed by `authentication.tasks.process_user_image`
+        image_changed = bool(self.image) and (not self.id or self.image != self.__original_image)
 
         if self.pk is not None and self.email != self.__original_email:
             email, email_created = EmailAddress.objects.get_or_create(
@@ -170,9 +168,28 @@ class User(AbstractUser):
             request.META['SERVER_NAME'] = settings.API_PUBLIC_HOST
             request.META['SERVER_PORT'] = settings.API_PUBLIC_PORT
             email.send_confirmation(request, signup=True)
+            # saved below, receivers can't update this instance
+            self.email_verified = EmailAddress.objects.filter(user=self, verified=True).exists()
         self.__original_email = self.email
         self.__original_image = self.image
-        super(User, self).save(force_insert, force_update, *args, **kwargs)
+        if update_fields is None and not force_insert and not self._state.adding:
+            # loaded counters may be stale, concurrent F() updates must survive
+            update_fields = [field.name for field in self._meta.concrete_fields
+                             if not field.primary_key and field.name not in self.COUNTER_FIELDS]
+        super(User, self).save(force_insert, force_update, using, update_fields)
+
+        if image_changed:
+            from .tasks import process_user_image
+            transaction.on_commit(lambda: process_user_image.delay(self.pk))
+
+
+def update_users_counter(user_ids, field, delta):
+    """Atomically add delta to a denormalized counter of users"""
+    user_ids = [user_id for user_id in user_ids if user_id]
+    if not user_ids:
+        return
+    User.objects.filter(pk__in=user_ids).update(**{field: F(field) + delta})
+    cache.delete_many([get_serialized_user_cache_key(user_id) for user_id in user_ids])
 
 
 @receiver(post_save, sender=UserSocialAuth)
@@ -189,3 +206,28 @@ def on_user_created(sender, instance, created, **kwargs):
             request.META['SERVER_NAME'] = settings.API_PUBLIC_HOST
             request.META['SERVER_PORT'] = settings.API_PUBLIC_PORT
             email.send_confirmation(request, signup=True)
+
+
+@receiver(post_save, sender='oauth2_provider.AccessToken', dispatch_uid='access_token_post_save_signal')
+@receiver(post_delete, sender='oauth2_provider.AccessToken', dispatch_uid='access_token_post_delete_signal')
+def invalidate_access_token(sender, instance, **kwargs):
+    """Revoked/refreshed tokens stop working immediately (see authentication.tokens)"""
+    from .tokens import invalidate_token
+    invalidate_token(instance.token)
+
+
+@receiver(email_confirmed, dispatch_uid='user_email_confirmed_signal')
+def on_email_confirmed(request, email_address, **kwargs):
+    email_address.user.sync_email_verified()
+
+
+@receiver(post_save, sender=EmailAddress, dispatch_uid='email_address_post_save_signal')
+@receiver(post_delete, sender=EmailAddress, dispatch_uid='email_address_post_delete_signal')
+def on_email_address_changed(sender, instance, **kwargs):
+    """Addresses verified or changed outside of confirmation (admin, email change)"""
+    try:
+        user = instance.user
+    except User.DoesNotExist:
+        # deleted with the user
+        return
+    user.sync_email_verified()
@@ -3,6 +3,8 @@ from rest_auth.registration.serializers import RegisterSerializer
 
 from django.core.cache import cache
 
+from saas_core.presence import get_presence
+
 from .models import User, get_serialized_user_cache_key
 
 from rest_auth.serializers import PasswordResetSerializer
@@ -64,7 +66,7 @@ class CustomUserDetailsSerializer(serializers.ModelSerializer):
 
 
 
-def serialize_user_instance(user, context):
+def serialize_user_instance(user, context, is_online=None):
     request = context.get('request')
     if not user:
         return None
@@ -77,9 +79,9 @@ def serialize_user_instance(user, context):
         'image': request.build_absolute_uri(user.image.url) if request and user.image else None,
         'date_joined': user.date_joined.isoformat(),
         'last_active': user.last_active.isoformat(),
-        'is_online': user.is_online,
-        'services_count': user.services.count(),
-        'seekings_count': user.seekings.count()
+        'is_online': user.is_online if is_online is None else is_online,
+        'services_count': user.services_count,
+        'seekings_count': user.seekings_count,
     }
     return result
 
@@ -89,9 +91,44 @@ def get_user(user_id):
     except User.DoesNotExist:
         return None
 
+def serialize_simple_users(user_ids, context):
+    """
+    Serialize users of a whole page, returns {user_id: serialized user}
+
+    Takes users from context, then from cache (one get_many) and
+    fetches the rest in one query. Fills context for `serialize_simple_user`
+    """
+    keys = {user_id: get_serialized_user_cache_key(user_id)
+            for user_id in set(user_ids) if user_id}
+    result = {user_id: context[key]
+              for user_id, key in keys.items() if key in context}
+
+    missing = [user_id for user_id in keys if user_id not in result]
+    if missing:
+        cached = cache.get_many([keys[user_id] for user_id in missing])
+        for user_id in missing:
+            if keys[user_id] in cached:
+                result[user_id] = cached[keys[user_id]]
+
+    # online status is not cached with user, get all at once
+    online_user_ids = get_presence().get_online(keys.keys())
+
+    missing = [user_id for user_id in keys if user_id not in result]
+    if missing:
+        users = User.objects.filter(pk__in=missing)
+        serialized_users = {user.id: serialize_user_instance(user, context, user.id in online_user_ids)
+                            for user in users}
+        cache.set_many({keys[user_id]: serialized_user
+                        for user_id, serialized_user in serialized_users.items()})
+        result.update(serialized_users)
+
+    for user_id, serialized_user in result.items():
+        serialized_user['is_online'] = user_id in online_user_ids
+        context[keys[user_id]] = serialized_user
+    return result
+
+
 def serialize_simple_user(user_id=None, user=None, users=None, many=False, context=None):
-    def serialize(user):
-        return serialize_user_instance(user, context)
     if user_id:
         key = get_serialized_user_cache_key(user_id)
 
@@ -107,7 +144,7 @@ def serialize_simple_user(user_id=None, user=None, users=None, many=False, conte
 
         # serialize
         if not user:
-            user = get_user(user_id)
+            return serialize_simple_users([user_id], context).get(user_id)
         serialized_user = serialize_user_instance(user, context)
 
         if serialized_user:
@@ -121,60 +158,75 @@ def serialize_simple_user(user_id=None, user=None, users=None, many=False, conte
     elif many:
         if users is None:
             return None
-        return map(serialize, users.all())
+        user_ids = list(users.values_list('id', flat=True))
+        serialized_users = serialize_simple_users(user_ids, context)
+        return [serialized_users[user_id] for user_id in user_ids if user_id in serialized_users]
     else:
         return serialize_user_instance(user, context)
 
 
-class UserSerializer(serializers.HyperlinkedModelSerializer):
+class AuthorsListSerializer(serializers.ListSerializer):
+    """List serializer which serializes authors of all items at once"""
+
+    def warm_up_authors(self, items):
+        if self.context.get('request'):
+            serialize_simple_users([item.author_id for item in items], self.context)
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, 'all') else data)
+        self.warm_up_authors(items)
+        return super().to_representation(items)
+
+
+class UserListSerializer(serializers.ListSerializer):
+    """Online status of the whole page with one presence lookup"""
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, 'all') else data)
+        self.context['online_user_ids'] = get_presence().get_online(
+            [item.id for item in items])
+        return super().to_representation(items)
+
+
+class OnlineStatusMixin:
+    """`is_online` from `UserListSerializer` context, presence lookup otherwise"""
+
+    def get_is_online(self, instance):
+        online_user_ids = self.context.get('online_user_ids')
+        if online_user_ids is None:
+            return instance.is_online
+        return instance.id in online_user_ids
+
+
+class UserSerializer(OnlineStatusMixin, serializers.HyperlinkedModelSerializer):
     """
     Main user serializer
     """
-    services_count = serializers.SerializerMethodField()
-    seekings_count = serializers.SerializerMethodField()
-    def get_services_count(self, instance):
-        return instance.services.count()
-    def get_seekings_count(self, instance):
-        return instance.seekings.count()
+    is_online = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         # TODO
+        # counters are denormalized on User, see `update_users_counter`
         fields = ('id', 'url', 'bio', 'first_name', 'last_name',
                   'image', 'date_joined', 'last_active', 'is_online', 'services_count', 'seekings_count')
         read_only_fields = fields
-
-    def to_representation(self, instance):
-        response = super().to_representation(instance)
-        if (self.context['request']):
-            # if not isinstance(self.instance, list):
-            response['services_count'] = self.get_services_count(instance)
-            response['seekings_count'] = self.get_seekings_count(instance)
-        return response
+        list_serializer_class = UserListSerializer
 
 
-class PrivateUserSerializer(serializers.HyperlinkedModelSerializer):
+class PrivateUserSerializer(OnlineStatusMixin, serializers.HyperlinkedModelSerializer):
     """
     User serializer with private info
     """
-    notifications_count = serializers.SerializerMethodField()
-    services_count = serializers.SerializerMethodField()
-    seekings_count = serializers.SerializerMethodField()
-
-    def get_notifications_count(self, instance):
-        r = instance.notifications.count()
-        return r
-
-    def get_services_count(self, instance):
-        return instance.services.count()
-    def get_seekings_count(self, instance):
-        return instance.seekings.count()
+    is_online = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         # TODO
+        # own services and promotions are paginated by /services/my and /service-promotions/my
         fields = ('id', 'url', 'email', 'phone', 'bio', 'first_name', 'last_name', 'notifications_count', 'services_count', 'seekings_count',
-                  'service_promotions', 'services', 'is_verified_email', 'image', 'last_active', 'is_online')
+                  'is_verified_email', 'image', 'last_active', 'is_online')
         # outcome_reviews, income_reviwes
         read_only_fields = ('id', 'url', 'is_online', 'last_active', 'is_verified_email',
-                            'services', 'service_promotions', 'notifications_count',)
+                            'notifications_count', 'services_count', 'seekings_count')
+        list_serializer_class = UserListSerializer
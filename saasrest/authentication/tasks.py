@@ -0,0 +1,47 @@
+"""Authentication tasks"""
+import logging
+from datetime import datetime
+
+from celery import shared_task
+from django.core.cache import cache
+from django.utils import timezone
+
+from saas_core.images_compression import compress_field_file
+from saas_core.presence import get_presence
+
+from .models import User, get_serialized_user_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_last_active():
+    """Write buffered presence `last_active` timestamps in one batch"""
+    buffered = get_presence().pop_last_active()
+    if not buffered:
+        return 0
+
+    users = list(User.objects.filter(pk__in=buffered.keys()).only('pk', 'last_active'))
+    for user in users:
+        user.last_active = datetime.fromtimestamp(buffered[user.pk], tz=timezone.utc)
+    User.objects.bulk_update(users, ['last_active'])
+    cache.delete_many([get_serialized_user_cache_key(user.pk) for user in users])
+
+    logger.info('Flushed last_active of {} users'.format(len(users)))
+    return len(users)
+
+
+@shared_task
+def process_user_image(user_id):
+    """Compress uploaded user image"""
+    try:
+        user = User.objects.get(pk=user_id)
+    except User.DoesNotExist:
+        return
+    if not user.image:
+        return
+
+    name = compress_field_file(user.image)
+    # queryset update, so save() does not schedule processing again
+    User.objects.filter(pk=user_id).update(image=name)
+    cache.delete(get_serialized_user_cache_key(user_id))
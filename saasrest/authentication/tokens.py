@@ -0,0 +1,112 @@
+"""
+OAuth2 access token resolver
+
+Token -> (user id, expiration, scopes) lookups are cached for a short time,
+`post_save`/`post_delete` of AccessToken (revoke, refresh) drop cached entries
+(see `authentication.models`). Used by the websocket handshake
+(`TokenAuthMiddleware`) and REST (`CachedOAuth2Authentication`).
+"""
+import hashlib
+import time
+
+from channels.db import database_sync_to_async
+from django.core.cache import cache
+from oauth2_provider.models import AccessToken
+from rest_framework import authentication, exceptions
+
+TOKEN_CACHE_TIMEOUT = 60
+# unknown tokens are remembered shortly, so guessing does not hit db
+INVALID_TOKEN_CACHE_TIMEOUT = 5
+
+
+def get_token_cache_key(token):
+    # never put raw tokens into cache keys
+    return 'ACCESS_TOKEN_{}'.format(hashlib.sha256(token.encode('utf-8')).hexdigest())
+
+
+class CachedAccessToken:
+    """Cached part of AccessToken, enough for `request.auth` scope checks"""
+
+    def __init__(self, token, user_id, expires, scope):
+        self.token = token
+        self.user_id = user_id
+        self.expires = expires
+        self.scope = scope
+
+    def is_expired(self):
+        return self.expires <= time.time()
+
+    def allow_scopes(self, scopes):
+        if not scopes:
+            return True
+        return set(scopes).issubset(set(self.scope.split()))
+
+    def is_valid(self, scopes=None):
+        return not self.is_expired() and self.allow_scopes(scopes)
+
+
+def resolve_token(token):
+    """Valid CachedAccessToken or None"""
+    if not token:
+        return None
+    key = get_token_cache_key(token)
+    data = cache.get(key)
+    if data is None:
+        row = AccessToken.objects.filter(token=token)\
+            .values_list('user_id', 'expires', 'scope').first()
+        if row is None or row[0] is None:
+            cache.set(key, False, INVALID_TOKEN_CACHE_TIMEOUT)
+            return None
+        data = (row[0], row[1].timestamp(), row[2])
+        timeout = min(TOKEN_CACHE_TIMEOUT, int(data[1] - time.time()))
+        if timeout > 0:
+            cache.set(key, data, timeout)
+    if not data:
+        return None
+
+    access_token = CachedAccessToken(token, *data)
+    return access_token if not access_token.is_expired() else None
+
+
+def invalidate_token(token):
+    cache.delete(get_token_cache_key(token))
+
+
+def get_active_user(user_id):
+    from .models import User
+    return User.objects.filter(pk=user_id, is_active=True).first()
+
+
+@database_sync_to_async
+def resolve_token_user(token):
+    """(user or None, CachedAccessToken or None) without blocking the event loop"""
+    access_token = resolve_token(token)
+    if access_token is None:
+        return None, None
+    return get_active_user(access_token.user_id), access_token
+
+
+class CachedOAuth2Authentication(authentication.BaseAuthentication):
+    """Bearer token authentication, drop-in replacement of oauth2_provider OAuth2Authentication"""
+    www_authenticate_realm = 'api'
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if len(header) != 2 or header[0].lower() != b'bearer':
+            return None
+        try:
+            token = header[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid token header')
+
+        access_token = resolve_token(token)
+        if access_token is None:
+            # same as OAuth2Authentication, other authenticators may try
+            return None
+        user = get_active_user(access_token.user_id)
+        if user is None:
+            return None
+        return user, access_token
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="{}"'.format(self.www_authenticate_realm)
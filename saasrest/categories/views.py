@@ -1,7 +1,5 @@
 """Views"""
 from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action
@@ -11,6 +9,7 @@ from rest_framework.response import Response
 from .models import Category
 from .serializers import CategorySerializer
 
+from saas_core.cache import cache_response
 from saas_core.config import DEFAULT_PERMISSION_CLASSES
 
 # Create your views here.
@@ -22,10 +21,13 @@ class CategoryViewSet(viewsets.ModelViewSet):
     filter_backends = (filters.SearchFilter, DjangoFilterBackend, )
     search_fields = ('name', )
 
-    @method_decorator(cache_page(60*1))
-    def dispatch(self, request, *args, **kwargs):
-        """Cache"""
-        return super(CategoryViewSet, self).dispatch(request, *args, **kwargs)
+    @cache_response('categories.category', anonymous_only=False)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response('categories.category', anonymous_only=False)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         if self.request.user:
@@ -34,6 +36,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
             raise PermissionDenied()
 
     @action(detail=False, methods=['get'], url_path='name/(?P<category_name>[^/]+)')
+    @cache_response('categories.category', anonymous_only=False)
     def get_category_by_name(self, request, category_name):
         """
         Get category by name endpoint
@@ -1,11 +1,15 @@
 """Feed models"""
 from django.contrib.contenttypes.fields import GenericRelation
-from django.db import models
-from django.db.models.signals import post_delete
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from authentication.models import User
 from saas_core.images_compression import compress_image
+from saas_core.ranking import RANKED_MODELS
+from saas_core.search import update_search_vector
 from tags.models import Tag
 from votes.models import Vote
 
@@ -24,10 +28,29 @@ class FeedPost(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     score = models.IntegerField(default=0)
+    # time decayed score, see saas_core.ranking
+    hot_score = models.FloatField(default=0)
+    # denormalized vote counters, maintained by votes signals
+    up_votes_count = models.IntegerField(default=0)
+    down_votes_count = models.IntegerField(default=0)
+    favorites_count = models.IntegerField(default=0)
     votes = GenericRelation(Vote)
 
     images = GenericRelation(Image)
 
+    # full text search document, see `update_feed_post_search_vector`
+    search_vector = SearchVectorField(null=True, editable=False)
+    SEARCH_FIELDS = (('text', 'A'), )
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector']),
+            # keyset pagination
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['-score', '-id']),
+            models.Index(fields=['-hot_score', '-id']),
+        ]
+
     def likes(self):
         return self.votes.filter(activity_type=Vote.UP_VOTE)
 
@@ -41,3 +64,22 @@ class FeedPost(models.Model):
     #post.likes.create(activity_type=Vote.LIKE, user=request.user)
     # Or in a similar way using the Activity model to add the like
     #Vote.objects.create(content_object=post, activity_type=Activity.LIKE, user=request.user)
+
+
+@receiver(post_save, sender=FeedPost, dispatch_uid='feed_post_search_vector_signal')
+def update_feed_post_search_vector(sender, instance, update_fields=None, **kwargs):
+    """Keep search vector up to date"""
+    update_search_vector(instance, FeedPost.SEARCH_FIELDS, update_fields)
+
+
+@receiver(post_save, sender=Vote, dispatch_uid='vote_timeline_follow_signal')
+def follow_voted_object(sender, instance, created, **kwargs):
+    """Up votes and favorites shape the home timeline (see feed.timeline)"""
+    if not created or instance.activity_type == Vote.DOWN_VOTE:
+        return
+    model = instance.content_type.model_class()
+    if model is None or model._meta.label_lower not in RANKED_MODELS:
+        return
+    from .tasks import follow_object_sources
+    transaction.on_commit(lambda: follow_object_sources.delay(
+        instance.user_id, instance.content_type_id, instance.object_id))
@@ -3,6 +3,7 @@ from django.utils.translation import ugettext as _
 from rest_framework import serializers
 
 from authentication.serializers import serialize_simple_user
+from saas_core.reference import TAGS
 from saas_core.serializers import CreatableSlugRelatedField
 from tags.models import Tag
 from votes.serializers import VoteSerializer
@@ -10,10 +11,12 @@ from votes.serializers import VoteSerializer
 from .models import FeedPost
 
 from saas_core.models import Image
-from saas_core.serializers import ImageSerializer
+from saas_core.serializers import (CachedAuthorsListSerializer, ImageSerializer,
+                                   UserOverlayMixin)
 
-class FeedPostSerializer(serializers.HyperlinkedModelSerializer):
+class FeedPostSerializer(UserOverlayMixin, serializers.HyperlinkedModelSerializer):
     """FeedPost serializer"""
+    representation_cache_models = ('saas_core.image', 'tags.tag')
     images = ImageSerializer(
         many=True,
         read_only=True)
@@ -24,15 +27,17 @@ class FeedPostSerializer(serializers.HyperlinkedModelSerializer):
     tags = CreatableSlugRelatedField(
         many=True,
         queryset=Tag.objects,
-        slug_field='name'
+        slug_field='name',
+        reference_cache=TAGS
     )
 
     current_user_vote = serializers.SerializerMethodField()
+    is_owner = serializers.SerializerMethodField()
 
     def get_current_user_vote(self, instance):
         """Current user vote on serialization"""
         user = self.get_current_user()
-        if not user or user.is_anonymous:
+        if not user or user.is_anonymous or self.skip_user_fields():
             return None
 
         if not isinstance(self.instance, list):
@@ -63,11 +68,14 @@ class FeedPostSerializer(serializers.HyperlinkedModelSerializer):
 
     class Meta:
         model = FeedPost
+        list_serializer_class = CachedAuthorsListSerializer
         fields = ('id', 'url', 'author', 'text', 'images',
                   'created_at', 'updated_at',
-                  'tags', 'score', 'current_user_vote', )
+                  'tags', 'score', 'up_votes_count', 'down_votes_count', 'favorites_count',
+                  'current_user_vote', 'is_owner', )
         read_only_fields = ('id', 'url', 'created_at', 'updated_at',
-                            'author', 'score', 'current_user_vote', 'images', )
+                            'author', 'score', 'up_votes_count', 'down_votes_count', 'favorites_count',
+                            'current_user_vote', 'is_owner', 'images', )
         required_fields = ('text', 'tags',)
         extra_kwargs = {field: {'required': True} for field in required_fields}
 
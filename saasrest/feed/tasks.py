@@ -0,0 +1,35 @@
+"""Feed tasks"""
+import logging
+
+from celery import shared_task
+from django.contrib.contenttypes.models import ContentType
+
+from .models import FeedPost
+from .timeline import get_sources, get_timeline
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def fan_out_post(post_id):
+    """Push new post to home timelines of its author and tags followers"""
+    try:
+        post = FeedPost.objects.get(pk=post_id)
+    except FeedPost.DoesNotExist:
+        return 0
+    tag_ids = list(post.tags.values_list('id', flat=True))
+    count = get_timeline().add_post(post.pk, post.created_at.timestamp(), post.author_id,
+                                    get_sources(post.author_id, tag_ids))
+    logger.info('Feed post #{} pushed to {} timelines'.format(post.pk, count))
+    return count
+
+
+@shared_task
+def follow_object_sources(user_id, content_type_id, object_id):
+    """User voted for an object (feed post, service, seeking), follow its author and tags"""
+    model = ContentType.objects.get_for_id(content_type_id).model_class()
+    obj = model.objects.filter(pk=object_id).only('pk', 'author_id').first()
+    if obj is None or obj.author_id == user_id:
+        return
+    tag_ids = list(obj.tags.values_list('id', flat=True))
+    get_timeline().follow(user_id, get_sources(obj.author_id, tag_ids))
@@ -0,0 +1,142 @@
+"""
+Personalized home timeline
+
+Users follow "sources": authors and tags of objects they up vote or favorite
+(see `feed.tasks.follow_object_sources`). Posts are materialized in redis:
+
+- timeline:home:<user id>      ZSET post id -> created timestamp
+- timeline:source:<source>     ZSET recent posts of a source
+- timeline:followers:<source>  SET of user ids
+- timeline:sources:<user id>   SET of followed sources
+- timeline:heavy               SET of sources with more than FANOUT_LIMIT followers
+
+New posts are pushed to followers home timelines (fan-out on write), except
+for heavy sources whose posts are merged into pages on read instead.
+"""
+from django.conf import settings
+
+# max posts kept per home timeline / per source
+TIMELINE_SIZE = 800
+SOURCE_SIZE = 200
+# followers count above which a source is merged on read
+FANOUT_LIMIT = 5000
+# followers homes updated per pipeline
+FANOUT_BATCH_SIZE = 1000
+
+HOME_KEY = 'timeline:home:{}'
+SOURCE_KEY = 'timeline:source:{}'
+FOLLOWERS_KEY = 'timeline:followers:{}'
+SOURCES_KEY = 'timeline:sources:{}'
+HEAVY_KEY = 'timeline:heavy'
+
+
+def author_source(author_id):
+    return 'author:{}'.format(author_id)
+
+
+def tag_source(tag_id):
+    return 'tag:{}'.format(tag_id)
+
+
+def get_sources(author_id, tag_ids):
+    return [author_source(author_id)] + [tag_source(tag_id) for tag_id in tag_ids]
+
+
+class Timeline:
+    """Home timelines stored in redis"""
+
+    def __init__(self, url=None):
+        import redis
+        self.redis = redis.Redis.from_url(url or settings.TIMELINE_REDIS_URL)
+
+    def push(self, user_ids, post_id, timestamp):
+        """Add post to home timelines of users"""
+        user_ids = list(user_ids)
+        for start in range(0, len(user_ids), FANOUT_BATCH_SIZE):
+            pipe = self.redis.pipeline(transaction=False)
+            for user_id in user_ids[start:start + FANOUT_BATCH_SIZE]:
+                key = HOME_KEY.format(int(user_id))
+                pipe.zadd(key, {post_id: timestamp})
+                pipe.zremrangebyrank(key, 0, -TIMELINE_SIZE - 1)
+            pipe.execute()
+
+    def add_post(self, post_id, timestamp, author_id, sources):
+        """Fan out new post, returns number of home timelines updated"""
+        pipe = self.redis.pipeline(transaction=False)
+        for source in sources:
+            key = SOURCE_KEY.format(source)
+            pipe.zadd(key, {post_id: timestamp})
+            pipe.zremrangebyrank(key, 0, -SOURCE_SIZE - 1)
+            pipe.scard(FOLLOWERS_KEY.format(source))
+        # every third reply is a followers count
+        counts = pipe.execute()[2::3]
+
+        light = []
+        pipe = self.redis.pipeline(transaction=False)
+        for source, count in zip(sources, counts):
+            if count > FANOUT_LIMIT:
+                pipe.sadd(HEAVY_KEY, source)
+            else:
+                pipe.srem(HEAVY_KEY, source)
+                light.append(FOLLOWERS_KEY.format(source))
+        if light:
+            pipe.sunion(light)
+        replies = pipe.execute()
+
+        followers = set(replies[-1]) if light else set()
+        # authors see their own posts
+        followers.add(author_id)
+        self.push(followers, post_id, timestamp)
+        return len(followers)
+
+    def follow(self, user_id, sources):
+        """Follow sources, recent posts of new light sources are merged into home"""
+        pipe = self.redis.pipeline(transaction=False)
+        for source in sources:
+            pipe.sadd(SOURCES_KEY.format(user_id), source)
+            pipe.sadd(FOLLOWERS_KEY.format(source), user_id)
+            pipe.sismember(HEAVY_KEY, source)
+        replies = pipe.execute()
+
+        backfill = [SOURCE_KEY.format(source)
+                    for source, added, heavy in zip(sources, replies[::3], replies[2::3])
+                    if added and not heavy]
+        if backfill:
+            key = HOME_KEY.format(user_id)
+            pipe = self.redis.pipeline()
+            pipe.zunionstore(key, [key] + backfill, aggregate='MAX')
+            pipe.zremrangebyrank(key, 0, -TIMELINE_SIZE - 1)
+            pipe.execute()
+
+    def get_page(self, user_id, before=None, count=20):
+        """[(post id, timestamp)] newest first, older than `before` timestamp"""
+        max_score = '({}'.format(before) if before is not None else '+inf'
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zrevrangebyscore(HOME_KEY.format(user_id), max_score, '-inf',
+                              start=0, num=count, withscores=True)
+        pipe.sinter(SOURCES_KEY.format(user_id), HEAVY_KEY)
+        items, heavy = pipe.execute()
+
+        if heavy:
+            # fan-out on read
+            pipe = self.redis.pipeline(transaction=False)
+            for source in heavy:
+                pipe.zrevrangebyscore(SOURCE_KEY.format(source.decode()), max_score, '-inf',
+                                      start=0, num=count, withscores=True)
+            for source_items in pipe.execute():
+                items.extend(source_items)
+
+        merged = {}
+        for post_id, timestamp in items:
+            merged[int(post_id)] = timestamp
+        return sorted(merged.items(), key=lambda item: (-item[1], -item[0]))[:count]
+
+
+_timeline = None
+
+
+def get_timeline():
+    global _timeline
+    if _timeline is None:
+        _timeline = Timeline()
+    return _timeline
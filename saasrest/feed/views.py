@@ -4,29 +4,39 @@ from django.shortcuts import render
 
 """FeedPosts views"""
 from django.core.exceptions import PermissionDenied
+from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
 from django_filters import rest_framework as django_rest_filters
-from rest_framework import filters, status, viewsets
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 from tags.models import Tag
 from votes.models import Vote
 from votes.serializers import VoteSerializer
+from votes.utils import create_vote
 
 from .models import FeedPost
 
 from .permissions import IsOwnerOrReadOnly
 from saas_core.permissions import IsAuthenticatedAndVerified
+from saas_core.search import FullTextSearchFilter
 from .serializers import FeedPostSerializer
+from .tasks import fan_out_post
+from .timeline import get_timeline
 
 import random
 
 from django.utils.translation import ugettext as _
 
+from saas_core.cache import FEED_MODELS, LISTING_CACHE_TIMEOUT, cache_response, refresh_authors
 from saas_core.config import DEFAULT_PERMISSION_CLASSES
+from saas_core.paginations import KeysetPagination
+from saas_core.ranking import HotOrderingFilter
 
 class FeedPostFilter(django_rest_filters.FilterSet):
     """Custom filter for feed_posts"""
@@ -64,20 +74,62 @@ class FeedPostViewSet(viewsets.ModelViewSet):
 
     permission_classes = DEFAULT_PERMISSION_CLASSES + [IsOwnerOrReadOnly, ]
 
-    filter_backends = (filters.SearchFilter,
+    filter_backends = (FullTextSearchFilter,
                        django_rest_filters.DjangoFilterBackend,
-                       filters.OrderingFilter)
-    ordering_fields = ('price', 'created_at', 'score')
+                       HotOrderingFilter)
+    ordering_fields = ('price', 'created_at', 'score', 'hot_score')
     search_fields = ('text',)
+    search_vector_field = 'search_vector'
     # filter_fields = ('author', 'author_id', 'tags__contain')
     filter_class = FeedPostFilter
+    pagination_class = KeysetPagination
+
+    @cache_response(*FEED_MODELS, timeout=LISTING_CACHE_TIMEOUT, refresh=refresh_authors)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response(*FEED_MODELS, timeout=LISTING_CACHE_TIMEOUT, refresh=refresh_authors)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         if self.request.user:
-            serializer.save(author=self.request.user)
+            post = serializer.save(author=self.request.user)
+            # after tags are saved
+            transaction.on_commit(lambda: fan_out_post.delay(post.id))
         else:
             raise PermissionDenied()
 
+    @action(detail=False, methods=['get'], permission_classes=DEFAULT_PERMISSION_CLASSES + [IsAuthenticated, ])
+    def home(self, request):
+        """
+        Home timeline of current user (.../feed/home?before=<timestamp>)
+
+        Posts of followed authors and tags (see feed.timeline),
+        hot posts until user votes for something
+        """
+        page_size = self.paginator.get_page_size(request)
+        before = request.query_params.get('before')
+        try:
+            before = float(before) if before else None
+        except ValueError:
+            raise ValidationError({'before': _('Invalid timestamp')})
+
+        items = get_timeline().get_page(request.user.id, before, page_size)
+        if not items and before is None:
+            page = list(self.get_queryset().order_by('-hot_score', '-id')[:page_size])
+        else:
+            posts = self.get_queryset().in_bulk([post_id for post_id, timestamp in items])
+            # deleted posts are dropped lazily
+            page = [posts[post_id] for post_id, timestamp in items if post_id in posts]
+
+        next_url = None
+        if len(items) == page_size:
+            next_url = replace_query_param(
+                request.build_absolute_uri(), 'before', repr(items[-1][1]))
+        serializer = self.get_serializer(page, many=True)
+        return Response({'next': next_url, 'results': serializer.data})
+
     # read only
     @action(detail=False, methods=['get'])
     def my(self, request):
@@ -98,10 +150,9 @@ class FeedPostViewSet(viewsets.ModelViewSet):
     def vote(self, request, pk, votetype):
         if self.request.user:
             current_feed_post = self.get_object()
-            if current_feed_post.votes.filter(user=self.request.user).exists():
+            vote = create_vote(current_feed_post, request.user, votetype)
+            if vote is None:
                 return Response({'detail': _("Already voted.")}, status=status.HTTP_400_BAD_REQUEST)
-            vote = current_feed_post.votes.create(
-                activity_type=votetype, user=request.user)
             serializer = VoteSerializer(
                 vote, many=False, context={'request': request})
             return Response(serializer.data)
@@ -0,0 +1,40 @@
+"""
+Readers of bundled EKATTE spreadsheets (locations/ekatte_data, see Ekat_str.txt)
+
+Every sheet has a header row with lower case column names, the first data
+row of Ek_atte.xls ("00000") is a service record with the version date.
+"""
+import os
+
+EKATTE_DATA_DIR = os.path.join(os.path.dirname(__file__), 'ekatte_data')
+
+LOCATIONS_FILE = 'Ek_atte.xls'
+DISTRICTS_FILE = 'Ek_obl.xls'
+MUNICIPALITIES_FILE = 'Ek_obst.xls'
+
+SERVICE_EKATTE = '00000'
+
+
+def format_cell(value):
+    """Numeric cells come as floats (1.0), codes are kept as text"""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def read_sheet(file_name, data_dir=EKATTE_DATA_DIR):
+    """Yields rows of the first sheet as {column: stripped text}"""
+    import xlrd
+    book = xlrd.open_workbook(os.path.join(data_dir, file_name), on_demand=True)
+    try:
+        sheet = book.sheet_by_index(0)
+        columns = [str(value).strip().lower() for value in sheet.row_values(0)]
+        for index in range(1, sheet.nrows):
+            row = dict(zip(columns, (format_cell(value) for value in sheet.row_values(index))))
+            if 'ekatte' in row:
+                row['ekatte'] = row['ekatte'].zfill(5)
+            if row.get('ekatte') == SERVICE_EKATTE:
+                continue
+            yield row
+    finally:
+        book.release_resources()
@@ -0,0 +1,99 @@
+"""
+Distance search over `Location` coordinates
+
+No PostGIS: candidates are narrowed by a bounding box over the
+(latitude, longitude) index, exact great circle distance is computed
+in SQL only for rows inside the box.
+"""
+import math
+
+from django.db.models import F, FloatField, Func
+from django.utils.translation import ugettext as _
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+from saas_core.reference import LOCATIONS
+
+EARTH_RADIUS_KM = 6371.0
+
+DEFAULT_RADIUS_KM = 25
+MAX_RADIUS_KM = 500
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(min lat, max lat, min lon, max lon) containing the circle"""
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    # no poles in our data
+    lon_delta = lat_delta / max(math.cos(math.radians(latitude)), 0.01)
+    return (latitude - lat_delta, latitude + lat_delta,
+            longitude - lon_delta, longitude + lon_delta)
+
+
+class Distance(Func):
+    """SQL haversine distance (km) from a point to (latitude, longitude) expressions"""
+    output_field = FloatField()
+
+    def __init__(self, latitude, longitude, point):
+        super().__init__(latitude, longitude)
+        self.point = point
+
+    def as_sql(self, compiler, connection, **extra_context):
+        latitude, longitude = self.get_source_expressions()
+        lat_sql, lat_params = compiler.compile(latitude)
+        lon_sql, lon_params = compiler.compile(longitude)
+        sql = ('(2 * %s * ASIN(LEAST(1, SQRT('
+               'POWER(SIN(RADIANS({lat} - %s) / 2), 2) + '
+               'COS(RADIANS(%s)) * COS(RADIANS({lat})) * '
+               'POWER(SIN(RADIANS({lon} - %s) / 2), 2)))))').format(lat=lat_sql, lon=lon_sql)
+        center_lat, center_lon = self.point
+        params = [EARTH_RADIUS_KM] + list(lat_params) + [center_lat, center_lat] + \
+            list(lat_params) + list(lon_params) + [center_lon]
+        return sql, params
+
+
+def filter_near(queryset, location, radius_km, field_name='location'):
+    """Objects located within radius_km of location, annotated with `distance`"""
+    point = (location.latitude, location.longitude)
+    min_lat, max_lat, min_lon, max_lon = bounding_box(*point, radius_km)
+    latitude = '{}__latitude'.format(field_name)
+    longitude = '{}__longitude'.format(field_name)
+    return queryset.filter(**{
+        '{}__range'.format(latitude): (min_lat, max_lat),
+        '{}__range'.format(longitude): (min_lon, max_lon),
+    }).annotate(distance=Distance(F(latitude), F(longitude), point))\
+        .filter(distance__lte=radius_km)
+
+
+class NearLocationFilter(filters.BaseFilterBackend):
+    """
+    `?near=<location id>&radius_km=<km>` filter, sorted by distance
+    unless `ordering` is given. Put after ordering filter in filter_backends
+    """
+    near_param = 'near'
+    radius_param = 'radius_km'
+    ordering_param = 'ordering'
+
+    def get_location(self, request):
+        try:
+            location = LOCATIONS.get('pk', request.query_params[self.near_param])
+        except (TypeError, ValueError):
+            location = None
+        if location is None or location.latitude is None:
+            raise ValidationError({self.near_param: _('Unknown location')})
+        return location
+
+    def get_radius(self, request):
+        try:
+            radius_km = float(request.query_params.get(self.radius_param, DEFAULT_RADIUS_KM))
+        except ValueError:
+            raise ValidationError({self.radius_param: _('Invalid radius')})
+        return min(max(radius_km, 0), MAX_RADIUS_KM)
+
+    def filter_queryset(self, request, queryset, view):
+        if not request.query_params.get(self.near_param):
+            return queryset
+        queryset = filter_near(queryset, self.get_location(request), self.get_radius(request),
+                               getattr(view, 'location_field', 'location'))
+        if self.ordering_param not in request.query_params:
+            queryset = queryset.order_by('distance', '-id')
+        return queryset
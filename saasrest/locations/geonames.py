@@ -0,0 +1,37 @@
+"""
+GeoNames country dump reader (e.g. http://download.geonames.org/export/dump/BG.zip)
+
+Tab separated, one place per line, see the dump readme for columns
+"""
+import csv
+import io
+import zipfile
+
+COLUMNS = ('geonameid', 'name', 'asciiname', 'alternatenames', 'latitude', 'longitude',
+           'feature_class', 'feature_code', 'country_code', 'cc2',
+           'admin1_code', 'admin2_code', 'admin3_code', 'admin4_code',
+           'population', 'elevation', 'dem', 'timezone', 'modification_date')
+
+
+def open_dump(path):
+    """Text stream of a dump, zipped (BG.zip) or not (BG.txt)"""
+    if path.endswith('.zip'):
+        archive = zipfile.ZipFile(path)
+        name = next(name for name in archive.namelist()
+                    if name.endswith('.txt') and not name.startswith('readme'))
+        return io.TextIOWrapper(archive.open(name), encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def read_places(path, feature_classes=('P', 'A')):
+    """Yields places as dicts, coordinates and population converted"""
+    with open_dump(path) as dump:
+        for row in csv.reader(dump, delimiter='\t', quoting=csv.QUOTE_NONE):
+            place = dict(zip(COLUMNS, row))
+            if place.get('feature_class') not in feature_classes:
+                continue
+            place['latitude'] = float(place['latitude'])
+            place['longitude'] = float(place['longitude'])
+            place['population'] = int(place['population'] or 0)
+            place['alternatenames'] = [name for name in place['alternatenames'].split(',') if name]
+            yield place
@@ -0,0 +1,96 @@
+"""Import districts and locations from bundled EKATTE spreadsheets"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from locations.ekatte import DISTRICTS_FILE, EKATTE_DATA_DIR, LOCATIONS_FILE, read_sheet
+from locations.models import District, Location
+from saas_core.cache import bump_model_version
+from saas_core.reference import invalidate_reference_cache
+
+DISTRICT_FIELDS = ('ekatte', 'name', 'region')
+LOCATION_FIELDS = ('t_v_m', 'name', 'oblast', 'obstina', 'kmetstvo', 'kind', 'category', 'altitude')
+INTEGER_FIELDS = ('kind', 'category', 'altitude')
+
+
+def read_rows(file_name, data_dir, key_field, fields):
+    """{key: {field: value}} of a sheet"""
+    rows = {}
+    for row in read_sheet(file_name, data_dir):
+        values = {field: row[field] for field in fields}
+        for field in INTEGER_FIELDS:
+            if field in values:
+                values[field] = int(values[field] or 0)
+        rows[row[key_field]] = values
+    return rows
+
+
+def diff_rows(model, key_field, fields, rows):
+    """(new instances, changed instances, changed fields) against db rows"""
+    existing = {}
+    for instance in model.objects.only('pk', key_field, *fields).order_by('pk'):
+        existing.setdefault(getattr(instance, key_field), instance)
+
+    created, updated, changed_fields = [], [], set()
+    for key, values in rows.items():
+        instance = existing.get(key)
+        if instance is None:
+            created.append(model(**{key_field: key}, **values))
+            continue
+        changed = [field for field, value in values.items() if getattr(instance, field) != value]
+        if changed:
+            for field in changed:
+                setattr(instance, field, values[field])
+            updated.append(instance)
+            changed_fields.update(changed)
+    return created, updated, sorted(changed_fields)
+
+
+class Command(BaseCommand):
+    help = 'Imports districts (Ek_obl.xls) and locations (Ek_atte.xls), safe to re-run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--data-dir', default=EKATTE_DATA_DIR)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        imports = (
+            (District, 'oblast', DISTRICT_FIELDS, DISTRICTS_FILE),
+            (Location, 'ekatte', LOCATION_FIELDS, LOCATIONS_FILE),
+        )
+
+        started = time.monotonic()
+        try:
+            rows = [read_rows(file_name, options['data_dir'], key_field, fields)
+                    for model, key_field, fields, file_name in imports]
+        except (OSError, KeyError, ValueError) as e:
+            raise CommandError('Can not read EKATTE data: {}'.format(e))
+        read = time.monotonic()
+
+        changes = [diff_rows(model, key_field, fields, model_rows)
+                   for (model, key_field, fields, file_name), model_rows in zip(imports, rows)]
+        diffed = time.monotonic()
+
+        if not options['dry_run']:
+            with transaction.atomic():
+                for (model, *_), (created, updated, changed_fields) in zip(imports, changes):
+                    model.objects.bulk_create(created, batch_size=options['batch_size'])
+                    if updated:
+                        model.objects.bulk_update(updated, changed_fields,
+                                                  batch_size=options['batch_size'])
+            # bulk operations skip post_save
+            for (model, *_), (created, updated, _) in zip(imports, changes):
+                if created or updated:
+                    label = model._meta.label_lower
+                    bump_model_version(label)
+                    invalidate_reference_cache(label)
+        written = time.monotonic()
+
+        for (model, *_), model_rows, (created, updated, _) in zip(imports, rows, changes):
+            self.stdout.write('{}: {} rows, {} created, {} updated'.format(
+                model.__name__, len(model_rows), len(created), len(updated)))
+        self.stdout.write('read {:.0f}ms, diff {:.0f}ms, write {:.0f}ms{}'.format(
+            (read - started) * 1000, (diffed - read) * 1000, (written - diffed) * 1000,
+            ' (dry run)' if options['dry_run'] else ''))
@@ -0,0 +1,90 @@
+"""Import coordinates of locations"""
+import csv
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from locations.geonames import read_places
+from locations.models import Location
+from saas_core.cache import bump_model_version
+
+
+def normalize_name(name):
+    return name.strip().lower().replace('ё', 'е')
+
+
+def read_csv(path):
+    """{ekatte: (latitude, longitude)} of `ekatte,latitude,longitude` rows"""
+    with open(path, encoding='utf-8') as csv_file:
+        return {row['ekatte'].zfill(5): (float(row['latitude']), float(row['longitude']))
+                for row in csv.DictReader(csv_file)}
+
+
+def match_geonames(path, locations):
+    """
+    {ekatte: (latitude, longitude)} matched by name and municipality
+
+    GeoNames admin2 codes of Bulgaria are EKATTE municipality codes (e.g. SOF46),
+    names unique in the whole country are matched without it
+    """
+    by_municipality = {}
+    by_name = defaultdict(list)
+    for place in read_places(path, feature_classes=('P', )):
+        point = (place['latitude'], place['longitude'])
+        for name in {place['name'], *place['alternatenames']}:
+            name = normalize_name(name)
+            by_municipality.setdefault((name, place['admin2_code']), point)
+            if point not in by_name[name]:
+                by_name[name].append(point)
+
+    coordinates = {}
+    for location in locations:
+        name = normalize_name(location.name)
+        point = by_municipality.get((name, location.obstina))
+        if point is None and len(by_name.get(name, ())) == 1:
+            point = by_name[name][0]
+        if point is not None:
+            coordinates[location.ekatte] = point
+    return coordinates
+
+
+class Command(BaseCommand):
+    help = 'Imports latitude/longitude of locations from a GeoNames dump or csv'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='GeoNames BG.zip/BG.txt or csv with ekatte,latitude,longitude')
+        parser.add_argument('--format', choices=('geonames', 'csv'), default='geonames')
+        parser.add_argument('--missing', action='store_true',
+                            help='Only locations without coordinates')
+
+    def handle(self, *args, **options):
+        locations = Location.objects.only('pk', 'ekatte', 'name', 'obstina', 'latitude', 'longitude')
+        if options['missing']:
+            locations = locations.filter(latitude=None)
+        locations = list(locations)
+
+        try:
+            if options['format'] == 'csv':
+                coordinates = read_csv(options['path'])
+            else:
+                coordinates = match_geonames(options['path'], locations)
+        except (OSError, KeyError, ValueError) as e:
+            raise CommandError('Can not read {}: {}'.format(options['path'], e))
+
+        changed = []
+        for location in locations:
+            point = coordinates.get(location.ekatte)
+            if point is not None and point != (location.latitude, location.longitude):
+                location.latitude, location.longitude = point
+                changed.append(location)
+
+        with transaction.atomic():
+            Location.objects.bulk_update(changed, ['latitude', 'longitude'], batch_size=1000)
+        if changed:
+            # bulk_update skips post_save
+            bump_model_version('locations.location')
+
+        missing = sum(1 for location in locations if location.ekatte not in coordinates)
+        self.stdout.write('{} locations updated, {} without coordinates'.format(
+            len(changed), missing))
@@ -28,3 +28,13 @@ class Location(models.Model):
     kind = models.PositiveSmallIntegerField(blank=False, null=False)
     category = models.PositiveSmallIntegerField(blank=False, null=False)
     altitude = models.PositiveSmallIntegerField(blank=False, null=False)
+
+    # WGS84, imported by `import_location_coordinates`
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # bounding box prefilter of locations.geo
+            models.Index(fields=['latitude', 'longitude']),
+        ]
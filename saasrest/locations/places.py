@@ -0,0 +1,256 @@
+"""
+Offline place name autocomplete (replaces live GeoNames search)
+
+Settlements come from the `Location` table, districts from `District`
+and municipalities from the bundled Ek_obst.xls. Names are indexed in
+latin transliteration, so "Пловдив", "plovdiv" and "plovdi" all match.
+Lookup is a binary search over sorted name keys (prefix of the name or
+of any of its words), misspelled queries fall back to bounded edit
+distance over names with the same first letter.
+
+Results keep the shape of `geocoder.geonames(...).json`.
+"""
+import bisect
+import logging
+import threading
+import time
+
+from django.db import DatabaseError
+
+from saas_core.cache import get_model_cache_name
+from saas_core.utils import get_cache_versions
+
+from .ekatte import MUNICIPALITIES_FILE, read_sheet
+from .models import District, Location
+
+logger = logging.getLogger(__name__)
+
+MAX_RESULTS = 10
+VERSION_CHECK_INTERVAL = 60
+SOFIA_EKATTE = '68134'
+
+# Bulgarian streamlined system
+TRANSLITERATION = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ж': 'zh',
+    'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n',
+    'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u', 'ф': 'f',
+    'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sht', 'ъ': 'a', 'ь': 'y',
+    'ю': 'yu', 'я': 'ya', 'ё': 'yo', 'ѝ': 'i',
+}
+
+FEATURE_CLASSES = {
+    'P': 'city, village,...',
+    'A': 'country, state, region,...',
+}
+FEATURE_CODES = {
+    'PPLC': 'capital of a political entity',
+    'PPLA': 'seat of a first-order administrative division',
+    'PPL': 'populated place',
+    'ADM1': 'first-order administrative division',
+    'ADM2': 'second-order administrative division',
+}
+# same name: capital, district centers and cities first
+FEATURE_RANKS = {'PPLC': 0, 'PPLA': 1, 'ADM1': 2, 'ADM2': 3, 'PPL': 4}
+
+
+def transliterate(text):
+    """Lower case latin key of a name"""
+    text = text.lower().replace('-', ' ')
+    return ' '.join(''.join(TRANSLITERATION.get(char, char) for char in text).split())
+
+
+def prefix_distance(query, key, limit):
+    """
+    Smallest Levenshtein distance between query and a prefix of key,
+    any value above limit is returned as limit + 1
+    """
+    key = key[:len(query) + limit]
+    previous = list(range(len(key) + 1))
+    for i, char_query in enumerate(query, 1):
+        current = [i]
+        for j, char_key in enumerate(key, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (char_query != char_key)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(min(previous), limit + 1)
+
+
+class Place:
+    __slots__ = ('name', 'key', 'code', 'lat', 'lng', 'state', 'state_code', 'location_id')
+
+    def __init__(self, name, code, lat, lng, state, state_code, location_id=None):
+        self.name = name
+        self.key = transliterate(name)
+        self.code = code
+        self.lat = lat
+        self.lng = lng
+        self.state = state
+        self.state_code = state_code
+        self.location_id = location_id
+
+    @property
+    def rank(self):
+        return (FEATURE_RANKS[self.code], len(self.key), self.key)
+
+    def to_json(self):
+        """geocoder GeonamesResult.json"""
+        feature_class = self.code[0] if self.code.startswith('P') else 'A'
+        lat = '{:.5f}'.format(self.lat) if self.lat is not None else None
+        lng = '{:.5f}'.format(self.lng) if self.lng is not None else None
+        raw = {
+            'name': self.name,
+            'toponymName': self.name,
+            'lat': lat,
+            'lng': lng,
+            'fcl': feature_class,
+            'fclName': FEATURE_CLASSES[feature_class],
+            'fcode': self.code,
+            'fcodeName': FEATURE_CODES[self.code],
+            'adminName1': self.state,
+            'adminCode1': self.state_code,
+            'countryName': 'България',
+            'countryCode': 'BG',
+            'locationId': self.location_id,
+        }
+        result = {
+            'address': self.name,
+            'class_description': raw['fclName'],
+            'code': self.code,
+            'country': raw['countryName'],
+            'country_code': raw['countryCode'],
+            'description': raw['fcodeName'],
+            'feature_class': feature_class,
+            'lat': lat,
+            'lng': lng,
+            'state': self.state,
+            'state_code': self.state_code,
+            'raw': raw,
+            'status': 'OK',
+        }
+        # geocoder drops empty values but always has `ok`
+        result = {key: value for key, value in result.items() if value}
+        result['ok'] = bool(lat and lng)
+        return result
+
+
+class PlaceIndex:
+    """Sorted (key, place) pairs of full names and their words"""
+
+    def __init__(self, places):
+        entries = []
+        for place in places:
+            words = place.key.split()
+            for index in range(len(words)):
+                entries.append((' '.join(words[index:]), index, place))
+        entries.sort(key=lambda entry: entry[0])
+        self.keys = [entry[0] for entry in entries]
+        self.entries = entries
+        self.by_letter = {}
+        for key, _, place in entries:
+            self.by_letter.setdefault(key[:1], []).append((key, place))
+
+    def prefix(self, query):
+        """Places with a name (or word of it) starting with query"""
+        start = bisect.bisect_left(self.keys, query)
+        end = bisect.bisect_left(self.keys, query + '\uffff')
+        return [(word_index, place) for key, word_index, place in self.entries[start:end]]
+
+    def fuzzy(self, query):
+        """Places whose name prefix is within a small edit distance of query"""
+        limit = 1 if len(query) < 6 else 2
+        matches = []
+        for key, place in self.by_letter.get(query[:1], ()):
+            distance = prefix_distance(query, key, limit)
+            if distance <= limit:
+                matches.append((distance, place))
+        return matches
+
+    def search(self, text, limit=MAX_RESULTS):
+        query = transliterate(text)
+        if not query:
+            return []
+        # (match kind, place rank), kinds: name prefix, word prefix, fuzzy
+        ranked = {}
+        for word_index, place in self.prefix(query):
+            score = (min(word_index, 1), ) + place.rank
+            ranked[place] = min(ranked.get(place, score), score)
+        if len(ranked) < limit and len(query) > 2:
+            for distance, place in self.fuzzy(query):
+                score = (1 + distance, ) + place.rank
+                ranked[place] = min(ranked.get(place, score), score)
+        return sorted(ranked, key=ranked.get)[:limit]
+
+
+def load_places():
+    """Places of locations, districts and municipalities"""
+    locations = {location.ekatte: location for location in Location.objects.only(
+        'pk', 'ekatte', 't_v_m', 'name', 'oblast', 'kind', 'latitude', 'longitude')}
+    districts = list(District.objects.all())
+    district_names = {district.oblast: district.name for district in districts}
+    district_centers = {district.ekatte for district in districts}
+
+    def center_place(name, code, ekatte, oblast):
+        center = locations.get(ekatte)
+        return Place(name, code,
+                     center.latitude if center else None, center.longitude if center else None,
+                     district_names.get(oblast), oblast)
+
+    places = []
+    for location in locations.values():
+        if location.ekatte == SOFIA_EKATTE:
+            code = 'PPLC'
+        elif location.ekatte in district_centers:
+            code = 'PPLA'
+        else:
+            code = 'PPL'
+        places.append(Place(location.name, code, location.latitude, location.longitude,
+                            district_names.get(location.oblast), location.oblast, location.pk))
+    for district in districts:
+        places.append(center_place(district.name, 'ADM1', district.ekatte, district.oblast))
+    try:
+        for row in read_sheet(MUNICIPALITIES_FILE):
+            places.append(center_place(row['name'], 'ADM2', row['ekatte'], row['obstina'][:3]))
+    except (ImportError, OSError, KeyError) as e:
+        logger.warning('Municipalities are not indexed: {}'.format(e))
+    return places
+
+
+VERSION_LABELS = ('locations.location', 'locations.district')
+
+_lock = threading.Lock()
+_index = None
+_version = None
+_checked_at = 0
+
+
+def get_place_index():
+    """Process local index, rebuilt when locations or districts change"""
+    global _index, _version, _checked_at
+    now = time.monotonic()
+    if _index is not None and now - _checked_at < VERSION_CHECK_INTERVAL:
+        return _index
+    version = get_cache_versions([get_model_cache_name(label) for label in VERSION_LABELS])
+    with _lock:
+        if _index is None or version != _version:
+            started = time.monotonic()
+            _index = PlaceIndex(load_places())
+            _version = version
+            logger.info('Place index built in {:.1f}ms'.format(
+                (time.monotonic() - started) * 1000))
+        _checked_at = now
+    return _index
+
+
+def search_places(text, limit=MAX_RESULTS):
+    """[geonames like json] of places matching text"""
+    return [place.to_json() for place in get_place_index().search(text, limit)]
+
+
+def warm_up():
+    """Build index at worker start"""
+    try:
+        get_place_index()
+    except DatabaseError as e:
+        logger.warning('Place index warm up failed: {}'.format(e))
@@ -1,6 +1,7 @@
-from django.core.cache import cache
 from rest_framework import serializers
 
+from saas_core.reference import DISTRICTS, LOCATIONS
+
 from .models import District, Location
 
 
@@ -24,7 +25,7 @@ class LocationSerializer(serializers.HyperlinkedModelSerializer):
     class Meta:
         model = Location
         fields = ('id', 'url',
-                  't_v_m', 'name',
+                  't_v_m', 'name', 'latitude', 'longitude',
                   #   'oblast', 'ekatte',
                   #   'obstina', 'kmetstvo', 'kind', 'category', 'altitude'
                   )
@@ -33,14 +34,19 @@ class LocationSerializer(serializers.HyperlinkedModelSerializer):
     def to_representation(self, instance):
         response = super().to_representation(instance)
         if self.context['request']:
-            district_data = cache.get(
-                'SERIALIZED_DISTRICT_{}'.format(instance.oblast))
-            if district_data is None:
-                district = District.objects.get(oblast=instance.oblast)
-                district_data = DistrictSerializer(
-                    district, many=False, context=self.context).data
-                cache.set('SERIALIZED_DISTRICT_{}'.format(
-                    instance.oblast), district_data)
-
-            response['district'] = district_data
+            district = DISTRICTS.get('oblast', instance.oblast)
+            response['district'] = DistrictSerializer(
+                district, many=False, context=self.context).data if district else None
         return response
+
+
+def serialize_location(location_id, context):
+    """Serialized location from process local reference cache, once per request"""
+    if location_id is None:
+        return None
+    key = 'SERIALIZED_LOCATION_{}'.format(location_id)
+    if key not in context:
+        location = LOCATIONS.get('pk', location_id)
+        context[key] = LocationSerializer(
+            location, many=False, context=context).data if location else None
+    return context[key]
@@ -1,19 +1,18 @@
 """Views"""
 from django.core.exceptions import PermissionDenied
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-import geocoder
 from saas_core.permissions import IsAdminUserOrReadOnly
 
 from .models import District, Location
+from .places import search_places
 from .serializers import DistrictSerializer, LocationSerializer
 
+from saas_core.cache import cache_response
 from saas_core.config import DEFAULT_PERMISSION_CLASSES
 
 class LocationViewSet(viewsets.ModelViewSet):
@@ -26,9 +25,13 @@ class LocationViewSet(viewsets.ModelViewSet):
     search_fields = ('name', 'ekatte', )
     filter_fields = ('ekatte',)
 
-    @method_decorator(cache_page(60*60*24*10))
-    def dispatch(self, request, *args, **kwargs):
-        return super(LocationViewSet, self).dispatch(request, *args, **kwargs)
+    @cache_response('locations.location', anonymous_only=False, timeout=60*60*24*10)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response('locations.location', anonymous_only=False, timeout=60*60*24*10)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     # create only for employee & customer.
 
@@ -40,25 +43,11 @@ class LocationViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], url_path='geo/(?P<geo_query>[^/]+)')
     def get_geo(self, request, geo_query):
-        """geocoder api endpoint"""
-        try:
-            resp = geocoder.geonames(geo_query,
-                                     country=['BG'],
-                                     key='timadevelop',
-                                     maxRows=10,
-                                     lang='bg',
-                                     # adm and cities / village
-                                     featureClass=['P', 'A'],
-                                     fuzzy=1.0)
-            # isNameRequired=True)
-            # name_startsWith=[geo_query],
-        except Location.DoesNotExist:
-            return Response(status=status.HTTP_404_NOT_FOUND)
-
-        result = [r.json for r in resp]
-        return Response(result)
+        """place names autocomplete, geonames like results (see locations.places)"""
+        return Response(search_places(geo_query))
 
     @action(detail=False, methods=['get'], url_path='ekatte/(?P<ekatte>[^/]+)')
+    @cache_response('locations.location', anonymous_only=False, timeout=60*60*24*10)
     def get_by_ekatte(self, request, ekatte):
         # TODO: cache
         try:
@@ -73,6 +62,7 @@ class LocationViewSet(viewsets.ModelViewSet):
             return Response(status=status.HTTP_404_NOT_FOUND)
 
     @action(detail=False, methods=['get'], url_path='major')
+    @cache_response('locations.location', 'locations.district', anonymous_only=False, timeout=60*60*24*10)
     def get_major_cities(self, request):
         try:
             districts_ekatte = District.objects.values_list('ekatte')
@@ -106,9 +96,13 @@ class DistrictViewSet(viewsets.ModelViewSet):
     filter_fields = ()
     lookup_field = 'oblast'
 
-    @method_decorator(cache_page(60*60*24*10))
-    def dispatch(self, request, *args, **kwargs):
-        return super(DistrictViewSet, self).dispatch(request, *args, **kwargs)
+    @cache_response('locations.district', anonymous_only=False, timeout=60*60*24*10)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response('locations.district', anonymous_only=False, timeout=60*60*24*10)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     # create only for employee & customer.
     def perform_create(self, serializer):
@@ -1,10 +1,13 @@
-from django.utils import timezone
+import asyncio
 
+from asgiref.sync import sync_to_async
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.layers import get_channel_layer
 from messaging.models import Conversation
+from notifications import delivery
 from notifications.models import Notification
+from saas_core.presence import HEARTBEAT_INTERVAL, get_presence
 
 
 class ChatConsumer(AsyncJsonWebsocketConsumer):
@@ -12,15 +15,25 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
     room_group_name = None
 
     user_room_group = None
+    presence_task = None
 
-    @database_sync_to_async
+    @sync_to_async
     def change_user_online_status(self, is_online):
         if not self.user.is_anonymous:
-            cache_value = self.user.set_online_status(is_online)
-            if not cache_value:
-                # update last_active
-                self.user.last_active = timezone.now()
-                self.user.save(update_fields=['last_active'])
+            presence = get_presence()
+            if is_online:
+                presence.connect(self.user.id, self.channel_name)
+            else:
+                presence.disconnect(self.user.id, self.channel_name)
+            # last_active is flushed to db periodically
+            presence.touch(self.user.id)
+
+    async def keep_presence(self):
+        """Heartbeats while the connection is alive"""
+        presence = get_presence()
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            await sync_to_async(presence.heartbeat)(self.user.id, self.channel_name)
 
     @database_sync_to_async
     def get_conversation(self, id):
@@ -39,26 +52,12 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
             return None
 
     @database_sync_to_async
-    def set_notification_notified(self, id):
-        try:
-            result = Notification.objects.get(id=id)
-            if getattr(result, 'conversation', None):
-                result.delete()
-                return None
-            else:
-                result.notified = True
-                result.save(update_fields=['notified'])
-                return result
-        except:
-            return None
+    def acknowledge_notifications(self, notification_ids):
+        return delivery.acknowledge(self.user.id, notification_ids)
 
     @database_sync_to_async
     def remove_conversation_notifications(self, conversation_id):
-        # try:
-        result = Notification.objects.filter(
-            conversation_id=conversation_id, recipient_id=self.user.id).delete()
-        # except:
-        #     return None
+        return delivery.dismiss_conversation(self.user.id, conversation_id)
 
     async def connect(self):
         self.user = self.scope["user"]
@@ -84,6 +83,7 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
                     "payload": None
                 })
                 await self.change_user_online_status(True)
+                self.presence_task = asyncio.ensure_future(self.keep_presence())
             except:
                 await self.accept()
                 await self.close()
@@ -153,11 +153,19 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
         # )
 
     async def notification_ack(self, payload):
-        notification_id = payload["notification_id"]
-        if notification_id:
-            await self.set_notification_notified(notification_id)
+        """Ack of one (`notification_id`) or many (`notification_ids`) notifications"""
+        notification_ids = payload.get("notification_ids") or [payload.get("notification_id")]
+        try:
+            notification_ids = [int(notification_id) for notification_id in notification_ids
+                                if notification_id]
+        except (TypeError, ValueError):
+            return
+        if notification_ids:
+            await self.acknowledge_notifications(notification_ids)
 
     async def disconnect(self, close_code):
+        if self.presence_task:
+            self.presence_task.cancel()
         await self.change_user_online_status(False)
         await self.leave_group()
 
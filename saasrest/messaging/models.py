@@ -9,6 +9,14 @@ from django.contrib.contenttypes.fields import GenericRelation
 from saas_core.models import Image
 
 
+def get_message_text(text, author_first_name):
+    """Message text shown in previews"""
+    # TODO: rm null
+    if not text or text == 'null':
+        return "{} {}".format(author_first_name, _("sent you attachment"))
+    return text
+
+
 class Conversation(models.Model):
     """Conversation"""
     title = models.TextField(max_length=30, blank=False)
@@ -41,9 +49,9 @@ class Message(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # last message of conversation lookups
+        indexes = [models.Index(fields=['conversation', '-created_at'])]
+
     def get_text(self):
-        # TODO: rm null
-        if not self.text or self.text == 'null':
-            return "{} {}".format(self.author.first_name, _("sent you attachment"))
-        else:
-            return self.text
+        return get_message_text(self.text, self.author.first_name)
@@ -1,22 +1,47 @@
+from django.db.models import Sum
 from rest_framework import serializers
 
 import authentication.serializers
+from authentication.models import get_serialized_user_cache_key
 
-from .models import Conversation, Message
+from .models import Conversation, Message, get_message_text
 
 from django.utils.translation import ugettext as _
 
 from saas_core.models import Image
 from saas_core.serializers import ImageSerializer
 
+class ConversationListSerializer(serializers.ListSerializer):
+    """Serializes users of all conversations at once"""
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, 'all') else data)
+        request = self.context.get('request')
+        if request and request.user.is_authenticated:
+            memberships = Conversation.users.through.objects\
+                .filter(conversation_id__in=[item.id for item in items])\
+                .exclude(user_id=request.user.id)\
+                .values_list('conversation_id', 'user_id')
+            conversation_users = {item.id: [] for item in items}
+            for conversation_id, user_id in memberships:
+                conversation_users[conversation_id].append(user_id)
+            self.context['conversation_users'] = conversation_users
+            authentication.serializers.serialize_simple_users(
+                [user_id for user_ids in conversation_users.values() for user_id in user_ids],
+                self.context)
+        return super().to_representation(items)
+
+
 class ConversationSerializer(serializers.HyperlinkedModelSerializer):
 
     notifications_count = serializers.SerializerMethodField()
     last_msg = serializers.SerializerMethodField()
+    last_msg_at = serializers.SerializerMethodField()
 
     class Meta:
         model = Conversation
-        fields = ('id', 'url', 'title', 'users', 'created_at', 'last_msg', 'updated_at', 'notifications_count', )
+        list_serializer_class = ConversationListSerializer
+        fields = ('id', 'url', 'title', 'users', 'created_at', 'last_msg', 'last_msg_at', 'updated_at', 'notifications_count', )
         required_fields = ('users', 'title')
         extra_kwargs = {field: {'required': True} for field in required_fields}
 
@@ -24,23 +49,45 @@ class ConversationSerializer(serializers.HyperlinkedModelSerializer):
         response = super().to_representation(instance)
         user = self.get_current_user()
         if (self.context['request']) and user:
-            users = instance.users.exclude(id=user.id)
-            response['users'] = authentication.serializers.serialize_simple_user(users=users, many=True, context=self.context)
+            conversation_users = self.context.get('conversation_users', {})
+            if instance.id in conversation_users:
+                # warmed up by ConversationListSerializer
+                response['users'] = [self.context[get_serialized_user_cache_key(user_id)]
+                                     for user_id in conversation_users[instance.id]
+                                     if get_serialized_user_cache_key(user_id) in self.context]
+            else:
+                users = instance.users.exclude(id=user.id)
+                response['users'] = authentication.serializers.serialize_simple_user(users=users, many=True, context=self.context)
         return response
 
     def get_notifications_count(self, instance):
+        if hasattr(instance, 'notifications_count'):
+            # annotated by ConversationViewSet
+            return instance.notifications_count
         user = self.get_current_user()
         if not user:
             return 0
-        return instance.notifications.filter(recipient=user).count()
+        return instance.notifications.filter(recipient=user, notified=False)\
+            .aggregate(total=Sum('count'))['total'] or 0
 
     def get_last_msg(self, instance):
+        if hasattr(instance, 'last_msg_at'):
+            # annotated by ConversationViewSet
+            if instance.last_msg_at is None:
+                return instance.title
+            return get_message_text(instance.last_msg_text, instance.last_msg_author_first_name)
         try:
             msg = instance.messages.last()
             return msg.get_text()
         except:
             return instance.title
 
+    def get_last_msg_at(self, instance):
+        if hasattr(instance, 'last_msg_at'):
+            return instance.last_msg_at
+        msg = instance.messages.order_by('-created_at').first()
+        return msg.created_at if msg else None
+
     def get_current_user(self):
         """Gets Current user from request"""
         user = None
@@ -0,0 +1,59 @@
+"""Messaging tasks"""
+import logging
+import time
+
+from celery import shared_task
+
+from notifications import delivery
+
+from .models import Message
+
+logger = logging.getLogger(__name__)
+
+
+def get_recipients(msg):
+    """User ids of message recipients"""
+    return list(msg.conversation.users.exclude(id=msg.author_id).values_list('id', flat=True))
+
+
+def broadcast_message(msg, serializer_data):
+    """
+    Message fan-out pipeline:
+    resolve recipients -> create or coalesce notifications -> batched group sends
+    """
+    started = time.monotonic()
+    recipients = get_recipients(msg)
+    resolved = time.monotonic()
+
+    conversation_id = msg.conversation_id
+    # one pending notification per conversation, counting unseen messages
+    notifications = delivery.notify_users(
+        recipients,
+        title="New Message from {}".format(msg.author.first_name),
+        text=msg.get_text(),
+        group_key=delivery.conversation_group_key(conversation_id),
+        conversation_id=conversation_id,
+        redirect_url="/messages/c/{}".format(conversation_id))
+    created = time.monotonic()
+
+    delivery.deliver(notifications, extra_events=[('chat_%s' % conversation_id, {
+        "type": "new_message",
+        "payload": serializer_data,
+    })])
+    sent = time.monotonic()
+
+    logger.info('Message #{} fan-out to {} recipients: resolve {:.1f}ms, '
+                'notifications {:.1f}ms, send {:.1f}ms'.format(
+                    msg.id, len(recipients), (resolved - started) * 1000,
+                    (created - resolved) * 1000, (sent - created) * 1000))
+
+
+@shared_task
+def fan_out_message(message_id, serializer_data):
+    """Deliver new message to conversation and notify recipients"""
+    try:
+        msg = Message.objects.select_related('author', 'conversation').get(pk=message_id)
+    except Message.DoesNotExist:
+        # deleted before delivery
+        return
+    broadcast_message(msg, serializer_data)
@@ -1,4 +1,7 @@
 from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.db.models import DateTimeField, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action
@@ -6,14 +9,17 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from asgiref.sync import async_to_sync
-from saas_core.utils import (broadcast_deleted_message, broadcast_message,
-                             notify_user)
+from saas_core.utils import broadcast_deleted_message
+
+from notifications.models import Notification
 
 from .models import Conversation, Message
 from .permissions import IsOwner
 from .serializers import ConversationSerializer, MessageSerializer
+from .tasks import fan_out_message
 
 from saas_core.config import DEFAULT_PERMISSION_CLASSES
+from saas_core.paginations import KeysetPagination
 
 class MessageViewSet(viewsets.ModelViewSet):
     """
@@ -25,13 +31,16 @@ class MessageViewSet(viewsets.ModelViewSet):
                        DjangoFilterBackend, filters.OrderingFilter)
     ordering_fields = ('created_at', )
     search_fields = ('text')
+    pagination_class = KeysetPagination
+    keyset_ordering_fields = ('created_at', )
     filter_fields = ('conversation__id',)
 
     def perform_create(self, serializer):
         if self.request.user:
             msg = serializer.save(author=self.request.user)
-            # serializer_1 = self.serializer_class(msg, many=False, )
-            async_to_sync(broadcast_message)(msg, serializer.data)
+            # delivery and notifications are done by celery
+            data = serializer.data
+            transaction.on_commit(lambda: fan_out_message.delay(msg.id, data))
         else:
             raise PermissionDenied()
 
@@ -57,12 +66,32 @@ class ConversationViewSet(viewsets.ModelViewSet):
     permission_classes = DEFAULT_PERMISSION_CLASSES + [IsAuthenticated, IsOwner, ]
     filter_backends = (filters.SearchFilter,
                        DjangoFilterBackend, filters.OrderingFilter)
-    ordering_fields = ('created_at', 'updated_at')
+    ordering_fields = ('created_at', 'updated_at', 'last_activity')
+    ordering = ('-last_activity', )
     search_fields = ('title', 'users__first_name', 'users__last_name')
 
+    def annotate_queryset(self, queryset):
+        """Last message and unread messages count of every conversation as subqueries"""
+        last_messages = Message.objects.filter(
+            conversation=OuterRef('pk')).order_by('-created_at', '-id')
+        notifications_count = Notification.objects\
+            .filter(conversation=OuterRef('pk'), recipient=self.request.user, notified=False)\
+            .order_by().values('conversation')\
+            .annotate(total=Sum('count')).values('total')
+        return queryset.annotate(
+            last_msg_text=Subquery(last_messages.values('text')[:1]),
+            last_msg_author_first_name=Subquery(
+                last_messages.values('author__first_name')[:1]),
+            last_msg_at=Subquery(
+                last_messages.values('created_at')[:1], output_field=DateTimeField()),
+            notifications_count=Coalesce(
+                Subquery(notifications_count, output_field=IntegerField()), 0),
+        ).annotate(last_activity=Coalesce('last_msg_at', 'created_at'))
+
     def get_queryset(self):
         if self.request.user:
-            return self.queryset.filter(users__in=[self.request.user])
+            return self.annotate_queryset(
+                self.queryset.filter(users__in=[self.request.user]))
         else:
             raise PermissionDenied()
 
@@ -72,7 +101,7 @@ class ConversationViewSet(viewsets.ModelViewSet):
         if request.user.id == int(uid):
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
-        q = self.queryset.filter(users=request.user.id).filter(users=uid)
+        q = self.get_queryset().filter(users=uid)
         if q.exists():
             serializer = ConversationSerializer(
                 q.first(), many=False, context={'request': request})
@@ -0,0 +1,142 @@
+"""
+Notification delivery pipeline
+
+    notify_users -> deliver -> acknowledge -> prune
+
+Repeated events of a conversation (or any object) are coalesced: while
+a user has a pending (not notified) notification with the same
+`group_key`, the new event only bumps its `count` and replaces the text.
+Notifications are created and coalesced with one upsert per event, not
+per recipient, and pushed to `user_<id>` groups in batches of
+concurrent channel layer sends. Clients ack many ids at once, notified
+rows are removed by the `prune_notifications` task after NOTIFICATION_TTL.
+"""
+import logging
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.utils import timezone
+
+from authentication.models import update_users_counter
+from saas_core.utils import send_group_events
+
+from .models import Notification
+from .serializers import NotificationSerializer
+
+logger = logging.getLogger(__name__)
+
+# group sends awaited together
+DELIVERY_BATCH_SIZE = 500
+# notified notifications are kept this long
+NOTIFICATION_TTL = timedelta(days=30)
+PRUNE_BATCH_SIZE = 1000
+
+# insert or coalesce into the pending notification of each recipient
+# (`unique_pending_notification`), xmax = 0 only for inserted rows
+UPSERT_SQL = '''
+    INSERT INTO {table} (recipient_id, conversation_id, group_key, title, text, redirect_url,
+                         type, notification_datetime, notified, count, created_at, updated_at)
+    SELECT recipient_id, %s, %s, %s, %s, %s, %s, %s, false, 1, %s, %s
+    FROM unnest(%s::integer[]) AS recipient_id
+    ON CONFLICT (recipient_id, group_key) WHERE notified = false
+    DO UPDATE SET count = {table}.count + 1, title = EXCLUDED.title, text = EXCLUDED.text,
+                  redirect_url = EXCLUDED.redirect_url,
+                  notification_datetime = EXCLUDED.notification_datetime,
+                  updated_at = EXCLUDED.updated_at
+    RETURNING *, (xmax = 0) AS inserted
+'''
+
+
+def conversation_group_key(conversation_id):
+    return 'conversation:{}'.format(conversation_id)
+
+
+def object_group_key(instance, kind='info'):
+    return '{}:{}:{}'.format(instance._meta.label_lower, instance.pk, kind)
+
+
+def notify_users(recipient_ids, title, text, group_key=None, conversation_id=None,
+                 redirect_url='', type='info'):
+    """Create or coalesce notifications of recipients, returns their pending notifications"""
+    recipient_ids = sorted(set(recipient_ids))
+    if not recipient_ids:
+        return []
+    now = timezone.now()
+
+    if not group_key:
+        notifications = Notification.objects.bulk_create([
+            Notification(recipient_id=user_id, conversation_id=conversation_id,
+                         title=title, text=text, redirect_url=redirect_url, type=type,
+                         notification_datetime=now)
+            for user_id in recipient_ids])
+        # bulk_create skips post_save
+        update_users_counter(recipient_ids, 'notifications_count', 1)
+        return notifications
+
+    # one statement, so concurrent events and acks can't lose or double count an event
+    sql = UPSERT_SQL.format(table=Notification._meta.db_table)
+    notifications = list(Notification.objects.raw(sql, [
+        conversation_id, group_key, title, text, redirect_url, type, now, now, now,
+        recipient_ids]))
+    update_users_counter([notification.recipient_id for notification in notifications
+                          if notification.inserted], 'notifications_count', 1)
+    return notifications
+
+
+def get_delivery_events(notifications):
+    """[(group name, content)] of notifications"""
+    serialized = NotificationSerializer(notifications, many=True, context={'request': None}).data
+    return [('user_%s' % notification['recipient_id'], {
+        "type": "notification",
+        "payload": notification,
+    }) for notification in serialized]
+
+
+def send_events(events):
+    """Send events over the channel layer in batches of concurrent group sends"""
+    for start in range(0, len(events), DELIVERY_BATCH_SIZE):
+        async_to_sync(send_group_events)(events[start:start + DELIVERY_BATCH_SIZE])
+
+
+def deliver(notifications, extra_events=()):
+    """Push notifications (and other events, e.g. a new message) to users"""
+    events = list(extra_events) + get_delivery_events(notifications)
+    send_events(events)
+    return len(events)
+
+
+def acknowledge(user_id, notification_ids):
+    """Mark notifications of user as notified, returns number of acked notifications"""
+    notification_ids = [notification_id for notification_id in notification_ids if notification_id]
+    if not notification_ids:
+        return 0
+    notifications = Notification.objects.filter(recipient_id=user_id, pk__in=notification_ids)
+    acked = notifications.filter(notified=False)\
+        .update(notified=True, updated_at=timezone.now())
+    if acked:
+        update_users_counter([user_id], 'notifications_count', -acked)
+    # conversation notifications are not kept once seen,
+    # they are notified already so delete signals leave counters alone
+    notifications.filter(conversation__isnull=False).delete()
+    return acked
+
+
+def dismiss_conversation(user_id, conversation_id):
+    """Acknowledge all notifications of a conversation (user opened it)"""
+    ids = Notification.objects.filter(recipient_id=user_id, conversation_id=conversation_id)\
+        .values_list('pk', flat=True)
+    return acknowledge(user_id, list(ids))
+
+
+def prune(ttl=NOTIFICATION_TTL, batch_size=PRUNE_BATCH_SIZE):
+    """Delete notified notifications not updated for ttl, returns number of deleted rows"""
+    expired = Notification.objects.filter(notified=True, updated_at__lt=timezone.now() - ttl)
+    deleted = 0
+    while True:
+        ids = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+        deleted += Notification.objects.filter(pk__in=ids).delete()[0]
+    if deleted:
+        logger.info('Pruned {} notifications'.format(deleted))
+    return deleted
@@ -1,7 +1,9 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.timezone import now
 
-from authentication.models import User
+from authentication.models import User, update_users_counter
 from messaging.models import Conversation
 
 
@@ -15,16 +17,41 @@ class Notification(models.Model):
     title = models.TextField(max_length=30)
     text = models.TextField(max_length=150)
     notification_datetime = models.DateTimeField(default=now, blank=False)
+    # set by acks only (`notifications.delivery.acknowledge`), updates keep it
     notified = models.BooleanField(default=False)
     redirect_url = models.TextField(max_length=20, blank=True)
     type = models.TextField(max_length=30, default="info")
 
+    # pending notifications with the same key are coalesced, see `notifications.delivery`
+    group_key = models.TextField(max_length=100, null=True, blank=True)
+    # number of coalesced events
+    count = models.IntegerField(default=1)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    def save(self, *args, **kwargs):
-        """override save"""
-        # set notified to false on instance update
-        if 'update_fields' not in kwargs or 'notified' not in kwargs['update_fields']:
-            self.notified = False
-        super(Notification, self).save(*args, **kwargs)
+    class Meta:
+        indexes = [
+            models.Index(fields=['recipient', '-created_at', '-id']),
+            # pruning of old notified rows
+            models.Index(fields=['notified', 'updated_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['recipient', 'group_key'],
+                                    condition=models.Q(notified=False),
+                                    name='unique_pending_notification'),
+        ]
+
+
+# counters count pending (not notified) notifications,
+# bulk_create and acks in `notifications.delivery` update them themselves
+@receiver(post_save, sender=Notification, dispatch_uid='notification_counter_post_save_signal')
+def increment_notifications_count(sender, instance, created, **kwargs):
+    if created and not instance.notified:
+        update_users_counter([instance.recipient_id], 'notifications_count', 1)
+
+
+@receiver(post_delete, sender=Notification, dispatch_uid='notification_counter_post_delete_signal')
+def decrement_notifications_count(sender, instance, **kwargs):
+    if not instance.notified:
+        update_users_counter([instance.recipient_id], 'notifications_count', -1)
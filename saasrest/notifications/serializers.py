@@ -1,11 +1,9 @@
 """Serializers"""
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from rest_framework import serializers
 
-from asgiref.sync import async_to_sync
-from saas_core.utils import notify_user
-
 from .models import Notification
 
 
@@ -18,8 +16,8 @@ class NotificationSerializer(serializers.HyperlinkedModelSerializer):
         model = Notification
         fields = ('id', 'url', 'recipient', 'conversation', 'conversation_id',
                   'recipient_id', 'title', 'type', 'text', 'notification_datetime',
-                  'notified', 'redirect_url', 'created_at', 'updated_at')
-        read_only_fields = ('id', 'url', 'notified')
+                  'notified', 'count', 'redirect_url', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'url', 'notified', 'count')
         required_fields = ('recipient', 'title', 'text',
                            'notification_datetime')
         extra_kwargs = {field: {'required': True} for field in required_fields}
@@ -48,15 +46,9 @@ class NotificationSerializer(serializers.HyperlinkedModelSerializer):
     #     return response
 
 
-# send notification
+# send notification, notifications created in bulk are delivered by `notifications.delivery`
 @receiver(post_save, sender=Notification, dispatch_uid='notification_post_save_signal')
 def send_new_notification(sender, instance, created, **kwargs):
-    def send_notification(notification):
-        if not notification or not getattr(notification, 'recipient', False):
-            return False
-        serializer = NotificationSerializer(
-            notification, many=False, context={'request': None})
-        async_to_sync(notify_user)(notification.recipient.id, serializer.data)
-
-    if created:
-        send_notification(instance)
+    if created and instance.recipient_id:
+        from .tasks import deliver_notifications
+        transaction.on_commit(lambda: deliver_notifications.delay([instance.id]))
@@ -0,0 +1,18 @@
+"""Notifications tasks"""
+from celery import shared_task
+
+from . import delivery
+from .models import Notification
+
+
+@shared_task
+def deliver_notifications(notification_ids):
+    """Push notifications created one by one (e.g. over REST)"""
+    notifications = Notification.objects.filter(pk__in=notification_ids, notified=False)
+    return delivery.deliver(notifications)
+
+
+@shared_task
+def prune_notifications():
+    """Remove old notified notifications"""
+    return delivery.prune()
@@ -1,3 +1,87 @@
 from django.test import TestCase
 
-# Create your tests here.
+from authentication.models import User
+
+from . import delivery
+from .models import Notification
+
+GROUP_KEY = 'services.service:1:info'
+
+
+class NotificationPipelineTest(TestCase):
+    """Coalescing upsert and acks keep `count` and `notifications_count` right"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('user@example.com', 'password')
+        self.other = User.objects.create_user('other@example.com', 'password')
+
+    def notify(self, text='text', *users):
+        return delivery.notify_users([user.pk for user in users or (self.user, self.other)],
+                                     'title', text, group_key=GROUP_KEY)
+
+    def assertPending(self, user, count, notifications_count):
+        user.refresh_from_db()
+        self.assertEqual(user.notifications_count, notifications_count)
+        pending = Notification.objects.get(recipient=user, group_key=GROUP_KEY, notified=False)
+        self.assertEqual(pending.count, count)
+        return pending
+
+    def test_first_event(self):
+        notifications = self.notify()
+        self.assertEqual(sorted(n.recipient_id for n in notifications),
+                         sorted([self.user.pk, self.other.pk]))
+        self.assertTrue(all(n.inserted for n in notifications))
+        self.assertPending(self.user, count=1, notifications_count=1)
+        self.assertPending(self.other, count=1, notifications_count=1)
+
+    def test_repeated_event(self):
+        first = self.notify('first')
+        second = self.notify('second')
+        self.assertFalse(any(n.inserted for n in second))
+        self.assertEqual(sorted(n.pk for n in first), sorted(n.pk for n in second))
+        pending = self.assertPending(self.user, count=2, notifications_count=1)
+        self.assertEqual(pending.text, 'second')
+        self.assertEqual(Notification.objects.filter(recipient=self.user).count(), 1)
+
+    def test_event_after_ack(self):
+        self.notify()
+        acked = self.assertPending(self.user, count=1, notifications_count=1)
+        self.assertEqual(delivery.acknowledge(self.user.pk, [acked.pk]), 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.notifications_count, 0)
+
+        self.notify('new', self.user)
+        pending = self.assertPending(self.user, count=1, notifications_count=1)
+        self.assertNotEqual(pending.pk, acked.pk)
+        acked.refresh_from_db()
+        self.assertTrue(acked.notified)
+        self.assertEqual(acked.count, 1)
+
+    def test_bulk_ack(self):
+        self.notify()
+        own = Notification.objects.get(recipient=self.user)
+        foreign = Notification.objects.get(recipient=self.other)
+        already_acked = Notification.objects.create(
+            recipient=self.user, title='title', text='text')
+        delivery.acknowledge(self.user.pk, [already_acked.pk])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.notifications_count, 1)
+
+        acked = delivery.acknowledge(self.user.pk, [own.pk, already_acked.pk, foreign.pk, 0])
+        self.assertEqual(acked, 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.notifications_count, 0)
+        # other user's notification is untouched
+        self.assertPending(self.other, count=1, notifications_count=1)
+
+    def test_update_keeps_notified(self):
+        self.notify()
+        notification = self.assertPending(self.user, count=1, notifications_count=1)
+        delivery.acknowledge(self.user.pk, [notification.pk])
+        notification.refresh_from_db()
+        notification.text = 'edited'
+        notification.save()
+        notification.refresh_from_db()
+        self.assertTrue(notification.notified)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.notifications_count, 0)
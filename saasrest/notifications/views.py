@@ -7,6 +7,7 @@ from .permissions import IsOwnerOrReadOnly
 from .serializers import NotificationSerializer
 
 from saas_core.config import DEFAULT_PERMISSION_CLASSES
+from saas_core.paginations import KeysetPagination
 
 class NotificationViewSet(viewsets.ModelViewSet):
     """
@@ -19,6 +20,8 @@ class NotificationViewSet(viewsets.ModelViewSet):
     search_fields = ('recipient__first_name',
                      'recipient__last_name', 'title', 'text')
     # filter_fields = ('recipient__id')
+    pagination_class = KeysetPagination
+    keyset_ordering_fields = ('created_at', )
 
     # read only
     def get_queryset(self):
@@ -18,12 +18,15 @@ SERVICE_PROMOTIONS_PLANS = {
     "pro": {
         'days': 7,
         'amount': 403,
-        'currency': 'bgn'
+        'currency': 'bgn',
+        # promoted listings rotation weight
+        'weight': 2
     },
     "basic": {
         'days': 3,
         'amount': 274,
-        'currency': 'bgn'
+        'currency': 'bgn',
+        'weight': 1
     }
 }
 
@@ -45,7 +48,13 @@ def is_valid_payment_intent(plan, days, amount, currency, reason):
     return True
 
 
-def promote_service(user_id, service_id, days, intent_id):
+def get_plan_weight(plan):
+    """Promotion rotation weight of plan"""
+    plan_details = SERVICE_PROMOTIONS_PLANS.get(plan) or {}
+    return plan_details.get('weight', 1)
+
+
+def promote_service(user_id, service_id, days, intent_id, weight=1):
     """Promotes service"""
     logger.info('Promoting service...{}'.format(service_id))
 
@@ -65,7 +74,7 @@ def promote_service(user_id, service_id, days, intent_id):
     if not service:
         return
 
-    service_promotion = service.promote(user, intent_id, days)
+    service_promotion = service.promote(user, intent_id, days, weight)
     return service, service_promotion
 
 
@@ -17,7 +17,7 @@ from saas_core.utils import fix_django_headers
 
 from .models import Coupon
 from .serializers import CouponSerializer
-from .utils import promote_service, send_confirmation_email, is_valid_payment_intent
+from .utils import promote_service, send_confirmation_email, is_valid_payment_intent, get_plan_weight
 
 from fb_ads import utils as fb_ads_utils
 
@@ -266,9 +266,10 @@ class PaymentsViewSet(viewsets.ViewSet):
             user_id = int(metadata.get('user_id', None))
             model_id = int(metadata.get('model_id', None))
             days = int(metadata.get('days', None))
+            weight = get_plan_weight(str(metadata.get('plan', '')).lower())
 
             service, service_promotion = promote_service(
-                user_id, model_id, days, intent['id'])
+                user_id, model_id, days, intent['id'], weight)
             # Send email
             logger.info("Sending confirmation email about service promotion")
             send_confirmation_email(service, service_promotion, intent)
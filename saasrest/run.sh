@@ -7,10 +7,24 @@ python manage.py compilemessages -l bg
 python manage.py makemigrations saas_core authentication categories locations feedback messaging notifications payments public_configs services tags votes feed seeks
 python manage.py makemigrations
 
+# duplicates would fail the unique vote constraint, counters are reconciled below
+python manage.py dedupe_votes
 python manage.py migrate
+python manage.py import_ekatte
+python manage.py rebuild_search_index --missing
+python manage.py reconcile_vote_counters
+python manage.py sync_email_verified
+python manage.py reconcile_user_counters
+# GeoNames country dump (e.g. BG.zip) for location coordinates
+if [ -n "$GEONAMES_DUMP" ]; then
+    python manage.py import_location_coordinates "$GEONAMES_DUMP" --missing
+fi
 
 ./configure_api.sh
 
+# background tasks (worker with embedded beat scheduler)
+celery -A saasrest worker -B -l info &
+
 if [ "$ENV" = "production" ]; then
     echo Production env. Running on port $API_INTERNAL_PORT
     pip install uvicorn gunicorn
@@ -0,0 +1,71 @@
+"""
+Process local cache of verified API keys
+
+Clients send the same few keys with every request, verifying them means
+a db query plus a password hash check. Results are kept per worker for
+API_KEY_CACHE_TIMEOUT, changes of any APIKey (revoke, delete) bump the
+model generation (see `saas_core.models.invalidate_cached_responses`),
+which is checked at most every VERSION_CHECK_INTERVAL.
+"""
+import hashlib
+import threading
+import time
+
+from rest_framework_api_key.models import APIKey
+
+from saas_core.cache import get_model_cache_name
+from saas_core.utils import get_cache_version
+
+API_KEY_CACHE_TIMEOUT = 60 * 5
+VERSION_CHECK_INTERVAL = 5
+MAX_KEYS = 1000
+
+API_KEY_LABEL = 'rest_framework_api_key.apikey'
+
+
+class APIKeyCache:
+    """{sha256 of key: (is valid, cached until)}"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.keys = {}
+        self.version = None
+        self.checked_at = 0
+
+    def check_version(self, now):
+        if now - self.checked_at < VERSION_CHECK_INTERVAL:
+            return
+        version = get_cache_version(get_model_cache_name(API_KEY_LABEL))
+        with self.lock:
+            if version != self.version:
+                self.keys = {}
+                self.version = version
+            self.checked_at = now
+
+    def verify(self, key):
+        """Returns if the key is valid, hashes and queries only on cache miss"""
+        now = time.time()
+        self.check_version(now)
+        digest = hashlib.sha256(key.encode('utf-8')).digest()
+        cached = self.keys.get(digest)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+
+        try:
+            api_key = APIKey.objects.get_from_key(key)
+        except APIKey.DoesNotExist:
+            api_key = None
+        is_valid = api_key is not None and not api_key.has_expired
+        cached_until = now + API_KEY_CACHE_TIMEOUT
+        if is_valid and api_key.expiry_date is not None:
+            cached_until = min(cached_until, api_key.expiry_date.timestamp())
+
+        with self.lock:
+            if len(self.keys) >= MAX_KEYS:
+                # random keys of a scanner, start over
+                self.keys = {}
+            self.keys[digest] = (is_valid, cached_until)
+        return is_valid
+
+
+API_KEYS = APIKeyCache()
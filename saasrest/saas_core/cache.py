@@ -0,0 +1,131 @@
+"""
+Versioned response cache
+
+GET responses are cached under keys built from view/action, host, language,
+normalized query params, anonymous/authenticated split and generation
+counters of models the response depends on. Saving or deleting any of
+`CACHED_MODELS` bumps its counter (see `saas_core.models`).
+
+Listings don't depend on votes and users, which change all the time:
+vote counters (queryset updates, no counter bump) expire with the short
+LISTING_CACHE_TIMEOUT, embedded authors (profile, online status) are
+replaced on every response by `refresh_authors`. Timeouts of listings
+hiding promoted objects end when the nearest promotion expires.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.core.cache import cache
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.translation import get_language
+from rest_framework.response import Response
+
+from saas_core.utils import bump_cache_version, get_cache_versions
+
+RESPONSE_CACHE_TIMEOUT = 60 * 10
+# services, seekings and feed, bounds staleness of vote counters
+LISTING_CACHE_TIMEOUT = 60
+
+TAG_USAGE = 'tags.tag_usage'
+
+# models with generation counters, labels in lower case
+CACHED_MODELS = {
+    'categories.category',
+    'feed.feedpost',
+    'locations.district',
+    'locations.location',
+    'rest_framework_api_key.apikey',
+    'saas_core.image',
+    'seeks.seeking',
+    'services.service',
+    'tags.tag',
+    # not a model: Tag.usage_count, bumped by `tags.tasks.update_usage_counts`
+    TAG_USAGE,
+}
+
+# common dependencies of listings
+SERVICES_MODELS = ('services.service', 'saas_core.image', 'tags.tag',
+                   'categories.category', 'locations.location')
+SEEKS_MODELS = ('seeks.seeking', 'saas_core.image', 'tags.tag',
+                'categories.category', 'locations.location')
+FEED_MODELS = ('feed.feedpost', 'saas_core.image', 'tags.tag')
+# tag endpoints show usage counts, listings don't
+TAGS_MODELS = ('tags.tag', TAG_USAGE)
+
+
+def get_model_cache_name(label):
+    return 'MODEL_{}'.format(label)
+
+
+def bump_model_version(label):
+    """Invalidate cached responses depending on a model (`app_label.model`)"""
+    bump_cache_version(get_model_cache_name(label))
+
+
+def get_response_cache_key(request, view, labels, kwargs):
+    query_params = sorted((param, sorted(request.query_params.getlist(param)))
+                          for param in request.query_params)
+    versions = get_cache_versions([get_model_cache_name(label) for label in labels])
+    raw_key = json.dumps([
+        type(view).__name__, view.action, sorted(kwargs.items()),
+        request.get_host(), get_language(), query_params,
+        request.user.is_authenticated, versions,
+    ])
+    return 'RESPONSE_{}'.format(hashlib.md5(raw_key.encode('utf-8')).hexdigest())
+
+
+def refresh_authors(request, data):
+    """Replace `author` of cached items (detail or page) with current user summaries"""
+    from authentication.serializers import serialize_simple_users
+    items = data.get('results', [data]) if isinstance(data, dict) else data
+    authored = [item for item in items
+                if isinstance(item, dict) and isinstance(item.get('author'), dict)]
+    if authored:
+        users = serialize_simple_users([item['author']['id'] for item in authored],
+                                       {'request': request})
+        for item in authored:
+            item['author'] = users.get(item['author']['id'], item['author'])
+    return data
+
+
+def until_promotion_ends(view, timeout=LISTING_CACHE_TIMEOUT):
+    """Listing timeout, ends when the nearest promotion expires (`promoted_til`)"""
+    now = timezone.now()
+    nearest = type(view).queryset.model.objects.filter(promoted_til__gt=now)\
+        .aggregate(nearest=Min('promoted_til'))['nearest']
+    if nearest is not None:
+        timeout = min(timeout, max(int((nearest - now).total_seconds()), 1))
+    return timeout
+
+
+def cache_response(*labels, timeout=RESPONSE_CACHE_TIMEOUT, anonymous_only=True, refresh=None):
+    """
+    Cache viewset action response until any of `labels` models change
+
+    timeout: seconds or callable(view) returning them
+    anonymous_only: responses with per-user data (votes, ownership)
+    are cached only for anonymous users
+    refresh: callable(request, data) updating volatile parts of
+    every response (e.g. `refresh_authors`)
+    """
+    assert set(labels) <= CACHED_MODELS, 'Add models to CACHED_MODELS'
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method != 'GET' or (anonymous_only and request.user.is_authenticated):
+                return func(self, request, *args, **kwargs)
+
+            key = get_response_cache_key(request, self, labels, kwargs)
+            data = cache.get(key)
+            if data is not None:
+                return Response(refresh(request, data) if refresh else data)
+
+            response = func(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, timeout(self) if callable(timeout) else timeout)
+            return response
+        return wrapper
+    return decorator
@@ -1,8 +1,19 @@
+import hashlib
+import os
 import sys
 from PIL import Image
 from io import BytesIO
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import InMemoryUploadedFile
 
+# responsive variants: name -> max width
+VARIANTS = {
+    'thumbnail': 160,
+    'medium': 480,
+    'full': 1280,
+}
+VARIANT_FORMATS = ('webp', 'jpeg')
+
 
 def compress_image(image):
     """Compress image"""
@@ -28,3 +39,46 @@ def compress_image(image):
                                           sys.getsizeof(output_io_stream),
                                           None)
     return uploaded_image
+
+
+def compress_field_file(field_file):
+    """
+    Compress stored image in place, returns new file name
+
+    Used by background tasks, the original file is replaced
+    """
+    old_name = field_file.name
+    compressed = compress_image(field_file)
+    # name without upload_to directories, they are applied again on save
+    name = '%s.jpg' % os.path.splitext(os.path.basename(old_name))[0]
+    field_file.save(name, compressed, save=False)
+    if field_file.name != old_name:
+        field_file.storage.delete(old_name)
+    return field_file.name
+
+
+def get_variant_key(source_name, variant, image_format):
+    """Deterministic storage key of a variant (changes with the source file)"""
+    digest = hashlib.md5(source_name.encode('utf-8')).hexdigest()
+    return 'images/variants/{}/{}.{}'.format(digest, variant, image_format)
+
+
+def render_variant(field_file, width, image_format):
+    """Resize stored image to `width`, returns ContentFile"""
+    field_file.open('rb')
+    try:
+        image_tmp = Image.open(field_file)
+        image_tmp.load()
+    finally:
+        field_file.close()
+
+    if image_tmp.mode in ('RGBA', 'LA', 'P'):
+        image_tmp = image_tmp.convert('RGBA')
+        background = Image.new('RGB', image_tmp.size, '#fff')
+        background.paste(image_tmp, image_tmp.split()[-1])
+        image_tmp = background
+
+    image_tmp.thumbnail((width, width * 4), Image.ANTIALIAS)
+    output_io_stream = BytesIO()
+    image_tmp.convert('RGB').save(output_io_stream, format=image_format.upper(), quality=70)
+    return ContentFile(output_io_stream.getvalue())
@@ -0,0 +1,27 @@
+"""Rebuild full text search vectors"""
+from django.core.management.base import BaseCommand
+
+from feed.models import FeedPost
+from saas_core.search import build_search_vector
+from seeks.models import Seeking
+from services.models import Service
+
+SEARCHABLE_MODELS = (Service, Seeking, FeedPost)
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds search vectors of services, seekings and feed posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--missing', action='store_true',
+                            help='Only rows without search vector')
+
+    def handle(self, *args, **options):
+        for model in SEARCHABLE_MODELS:
+            queryset = model.objects.all()
+            if options['missing']:
+                queryset = queryset.filter(search_vector=None)
+            updated = queryset.update(
+                search_vector=build_search_vector(model.SEARCH_FIELDS))
+            self.stdout.write('{}: {} rows indexed'.format(
+                model.__name__, updated))
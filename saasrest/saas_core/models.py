@@ -1,13 +1,31 @@
+import json
+
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
-from django.db.models.signals import post_delete
+from django.contrib.postgres.fields import JSONField
+from django.db import models, transaction
+from django.db.models import F, Func
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from saas_core.images_compression import compress_image
+from saas_core.images_compression import (VARIANT_FORMATS, VARIANTS,
+                                          get_variant_key, render_variant)
 
 # Create your models here.
 
+class JSONBMerge(Func):
+    """`field || value` of a jsonb field, merges keys in one statement"""
+    output_field = JSONField()
+
+    def __init__(self, field, value):
+        super().__init__(F(field))
+        self.value = value
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.get_source_expressions()[0])
+        return '({} || %s::jsonb)'.format(sql), list(params) + [json.dumps(self.value)]
+
+
 class Image(models.Model):
     """Generic Image model"""
     # Below the mandatory fields for generic relation
@@ -18,6 +36,20 @@ class Image(models.Model):
 
     image = models.ImageField(upload_to='images/%Y/%m/%d')
 
+    # compression is done by `saas_core.tasks.process_image`
+    PENDING = 'pending'
+    READY = 'ready'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Pending'),
+        (READY, 'Ready'),
+        (FAILED, 'Failed'),
+    )
+    status = models.CharField(max_length=10, choices=STATUSES, default=READY)
+
+    # {'<variant>.<format>': storage name}, see `get_variant`
+    variants = JSONField(default=dict, blank=True)
+
     __original_image = None
 
     def __init__(self, *args, **kwargs):
@@ -25,14 +57,89 @@ class Image(models.Model):
         self.__original_image = self.image
 
     def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
-        """Compress on save"""
-        if not self.id or self.image != self.__original_image:
-            self.image = compress_image(self.image)
+        """Store original and schedule compression"""
+        image_changed = not self.id or self.image != self.__original_image
+        old_variants = []
+        if image_changed:
+            self.status = self.PENDING
+            old_variants = list(self.variants.values())
+            self.variants = {}
         super().save(force_insert=force_insert, force_update=force_update,
                      using=using, update_fields=update_fields)
         self.__original_image = self.image
 
+        if image_changed:
+            from .tasks import process_image
+            storage = self.image.storage
+
+            def on_commit():
+                # files stay in place if the save is rolled back
+                for name in old_variants:
+                    storage.delete(name)
+                process_image.delay(self.pk)
+            transaction.on_commit(on_commit)
+
+    def render_variant(self, variant, image_format):
+        """Storage name of a variant of current image, rendered unless stored already"""
+        storage = self.image.storage
+        name = get_variant_key(self.image.name, variant, image_format)
+        if not storage.exists(name):
+            name = storage.save(name, render_variant(self.image, VARIANTS[variant], image_format))
+        return name
+
+    def get_variant(self, variant, image_format):
+        """Storage name of a variant, generated on first request"""
+        variant_id = '{}.{}'.format(variant, image_format)
+        if variant_id in self.variants:
+            return self.variants[variant_id]
+
+        name = self.render_variant(variant, image_format)
+        self.variants[variant_id] = name
+        # merge the key, concurrent requests render other variants.
+        # no generation bump: cached srcsets keep working through the lazy url
+        Image.objects.filter(pk=self.pk).update(variants=JSONBMerge('variants', {variant_id: name}))
+        return name
+
+    def generate_variants(self):
+        """
+        Render all variants of current image, caller stores `variants`
+        (see `saas_core.tasks.process_image`)
+        """
+        variants = {}
+        for variant in VARIANTS:
+            for image_format in VARIANT_FORMATS:
+                variants['{}.{}'.format(variant, image_format)] = \
+                    self.render_variant(variant, image_format)
+        # variants rendered lazily while pending are keyed on the source before compression
+        stored = Image.objects.filter(pk=self.pk).values_list('variants', flat=True).first() or {}
+        for name in set(stored.values()) | set(self.variants.values()):
+            if name not in variants.values():
+                self.image.storage.delete(name)
+        self.variants = variants
+
 
 @receiver(post_delete, sender=Image)
 def submission_delete(sender, instance, **kwargs):
+    for name in instance.variants.values():
+        instance.image.storage.delete(name)
     instance.image.delete(False)
+
+
+@receiver(post_save, dispatch_uid='response_cache_post_save_signal')
+@receiver(post_delete, dispatch_uid='response_cache_post_delete_signal')
+def invalidate_cached_responses(sender, **kwargs):
+    """Bump generation counter of models used by cached responses"""
+    from saas_core.cache import CACHED_MODELS, bump_model_version
+    from saas_core.reference import invalidate_reference_cache
+    label = sender._meta.label_lower
+    if label in CACHED_MODELS:
+        bump_model_version(label)
+        invalidate_reference_cache(label)
+
+
+@receiver(post_save, dispatch_uid='hot_score_post_save_signal')
+def init_hot_score(sender, instance, created, **kwargs):
+    """Rank new votable objects, later votes update hot score incrementally"""
+    from saas_core.ranking import RANKED_MODELS, update_hot_score
+    if created and sender._meta.label_lower in RANKED_MODELS:
+        update_hot_score(instance)
@@ -1,11 +1,35 @@
+from django.conf import settings
 from rest_framework import permissions
+from rest_framework_api_key.permissions import HasAPIKey
 # from django.contrib.auth.models import User
 
 
 from authentication.models import User
 
+from saas_core.api_keys import API_KEYS
 from saas_core.models import Image
 
+
+class HasCachedAPIKey(HasAPIKey):
+    """HasAPIKey verifying keys through process local cache (saas_core.api_keys)"""
+
+    def get_request_key(self, request):
+        custom_header = getattr(settings, 'API_KEY_CUSTOM_HEADER', None)
+        if custom_header is not None:
+            return request.META.get(custom_header)
+        authorization = request.META.get('HTTP_AUTHORIZATION', '')
+        keyword, _, key = authorization.partition(' ')
+        return key if keyword.lower() == 'api-key' else None
+
+    def has_permission(self, request, view):
+        key = self.get_request_key(request)
+        if not key:
+            return False
+        return API_KEYS.verify(key)
+
+    def has_object_permission(self, request, view, obj):
+        return self.has_permission(request, view)
+
 class IsAdminUserOrReadOnly(permissions.IsAdminUser):
 
     def has_permission(self, request, view):
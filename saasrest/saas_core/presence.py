@@ -0,0 +1,121 @@
+"""
+Users presence (online status)
+
+Every websocket connection is a member of the user's sorted set scored by
+its expiration time. Consumers refresh it with heartbeats, so connections of
+a dead worker expire by themselves instead of keeping users online.
+
+`last_active` timestamps are buffered here and written to db in batches
+by `authentication.tasks.flush_last_active`.
+
+Backend is chosen by `PRESENCE_BACKEND` setting:
+- saas_core.presence.RedisPresence (default)
+- saas_core.presence.InMemoryPresence (single process, dev/tests)
+"""
+import threading
+import time
+
+from django.conf import settings
+
+# connection expiration, consumers send heartbeats more often
+PRESENCE_TIMEOUT = getattr(settings, 'PRESENCE_TIMEOUT', 90)
+HEARTBEAT_INTERVAL = PRESENCE_TIMEOUT / 3
+
+USER_KEY = 'presence:user:{}'
+LAST_ACTIVE_KEY = 'presence:last_active'
+
+
+class RedisPresence:
+    """Presence stored in redis"""
+
+    def __init__(self, url=None):
+        import redis
+        self.redis = redis.Redis.from_url(url or settings.PRESENCE_REDIS_URL)
+
+    def connect(self, user_id, connection_id):
+        now = time.time()
+        key = USER_KEY.format(user_id)
+        pipe = self.redis.pipeline()
+        pipe.zadd(key, {connection_id: now + PRESENCE_TIMEOUT})
+        pipe.zremrangebyscore(key, '-inf', now)
+        pipe.expire(key, int(PRESENCE_TIMEOUT))
+        pipe.execute()
+
+    # heartbeat just moves connection expiration
+    heartbeat = connect
+
+    def disconnect(self, user_id, connection_id):
+        self.redis.zrem(USER_KEY.format(user_id), connection_id)
+
+    def get_online(self, user_ids):
+        """Set of online user ids, one round trip for any number of users"""
+        user_ids = list(user_ids)
+        now = time.time()
+        pipe = self.redis.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.zcount(USER_KEY.format(user_id), now, '+inf')
+        return {user_id for user_id, count in zip(user_ids, pipe.execute()) if count}
+
+    def is_online(self, user_id):
+        return user_id in self.get_online([user_id])
+
+    def touch(self, user_id):
+        """Buffer user last activity"""
+        self.redis.hset(LAST_ACTIVE_KEY, user_id, time.time())
+
+    def pop_last_active(self):
+        """Returns and clears buffered {user_id: timestamp}"""
+        pipe = self.redis.pipeline()
+        pipe.hgetall(LAST_ACTIVE_KEY)
+        pipe.delete(LAST_ACTIVE_KEY)
+        buffered, _ = pipe.execute()
+        return {int(user_id): float(timestamp) for user_id, timestamp in buffered.items()}
+
+
+class InMemoryPresence:
+    """Process local presence, same semantics as RedisPresence"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = {}
+        self.last_active = {}
+
+    def connect(self, user_id, connection_id):
+        with self.lock:
+            self.connections.setdefault(user_id, {})[connection_id] = time.time() + PRESENCE_TIMEOUT
+
+    heartbeat = connect
+
+    def disconnect(self, user_id, connection_id):
+        with self.lock:
+            self.connections.get(user_id, {}).pop(connection_id, None)
+
+    def get_online(self, user_ids):
+        now = time.time()
+        with self.lock:
+            return {user_id for user_id in user_ids
+                    if any(expires > now for expires in self.connections.get(user_id, {}).values())}
+
+    def is_online(self, user_id):
+        return user_id in self.get_online([user_id])
+
+    def touch(self, user_id):
+        with self.lock:
+            self.last_active[user_id] = time.time()
+
+    def pop_last_active(self):
+        with self.lock:
+            buffered, self.last_active = self.last_active, {}
+        return buffered
+
+
+_presence = None
+
+
+def get_presence():
+    """Configured presence backend instance"""
+    global _presence
+    if _presence is None:
+        from saas_core.config import load
+        _presence = load(settings.PRESENCE_BACKEND)()
+    return _presence
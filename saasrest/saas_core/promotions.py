@@ -0,0 +1,63 @@
+"""
+Promoted listings sampler
+
+Active promotions matching a filter are cached as a small pool of
+(id, weight, end timestamp) rows. The pool generation is bumped by
+`promote()`, so list requests never materialize promotion ids from db
+"""
+import hashlib
+import heapq
+import random
+import time
+
+from django.core.cache import cache
+
+from saas_core.utils import bump_cache_version, get_cache_version
+
+# pool lifetime, promotions of deleted/edited listings are dropped after it
+POOL_TIMEOUT = 60 * 5
+
+
+def get_pool_cache_key(name, filters_key):
+    digest = hashlib.md5(filters_key.encode('utf-8')).hexdigest()
+    return 'PROMOTION_POOL_{}_{}_{}'.format(name, get_cache_version(name), digest)
+
+
+def invalidate_promotion_pools(name):
+    """Call on promotion changes"""
+    bump_cache_version(name)
+
+
+def get_filters_key(request, params=('category', 'search', 'author_id', 'location_id')):
+    """Normalized promotion filter params"""
+    values = ['{}={}'.format(param, request.GET.get(param, '').strip().lower())
+              for param in params]
+    tags = sorted(set(tag.lower() for tag in request.GET.getlist('tags')))
+    values.append('tags={}'.format(','.join(tags)))
+    return '&'.join(values)
+
+
+def get_promotion_pool(name, filters_key, build_queryset):
+    """
+    Returns [(promotion id, weight), ...] of valid promotions
+
+    build_queryset: callable returning filtered promotions queryset
+    """
+    key = get_pool_cache_key(name, filters_key)
+    pool = cache.get(key)
+    if pool is None:
+        pool = [(pk, weight, end_datetime.timestamp()) for pk, weight, end_datetime
+                in build_queryset().values_list('id', 'weight', 'end_datetime')]
+        cache.set(key, pool, POOL_TIMEOUT)
+
+    now = time.time()
+    return [(pk, weight) for pk, weight, end_timestamp in pool if end_timestamp > now]
+
+
+def weighted_sample(pool, count):
+    """
+    Pick `count` ids without replacement, promotions with bigger weight
+    (better plan) are shown more often (Efraimidis-Spirakis sampling)
+    """
+    keyed = ((random.random() ** (1.0 / max(weight, 1)), pk) for pk, weight in pool)
+    return [pk for key, pk in heapq.nlargest(count, keyed)]
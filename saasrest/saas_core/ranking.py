@@ -0,0 +1,84 @@
+"""
+Hot (trending) ranking of votable objects
+
+    hot_score = sign(score) * log10(max(|score|, 1))
+                + (created_at - HOT_EPOCH) / HOT_GRAVITY
+
+Recency is part of the score itself: every HOT_GRAVITY seconds a newer
+object needs 10x less votes to rank equally, so older objects decay
+relative to new ones without recomputing stored scores over time.
+Votes update `hot_score` of their object in the same UPDATE as `score`
+(see `votes.models.apply_vote`), `refresh_hot_scores` only fixes rows
+whose score was changed by other means (admin, reconcile command).
+
+Views use `HotOrderingFilter`, `?ordering=hot` is an alias of `-hot_score`.
+"""
+import logging
+
+from django.apps import apps
+from django.db.models import F, FloatField, Func, Q
+from rest_framework import filters
+
+logger = logging.getLogger(__name__)
+
+# 2019-01-01 UTC, keeps scores small
+HOT_EPOCH = 1546300800
+# 12.5 hours per order of magnitude of votes
+HOT_GRAVITY = 45000
+
+RANKED_MODELS = ('services.service', 'seeks.seeking', 'feed.feedpost')
+
+ORDERING_ALIASES = {
+    'hot': '-hot_score',
+    '-hot': 'hot_score',
+}
+
+
+class HotScore(Func):
+    """SQL expression of hot score, `score` may be an expression (e.g. F('score') + 1)"""
+    output_field = FloatField()
+
+    def __init__(self, score=None, created_at=None):
+        super().__init__(score if score is not None else F('score'),
+                         created_at if created_at is not None else F('created_at'))
+
+    def as_sql(self, compiler, connection, **extra_context):
+        score, created_at = self.get_source_expressions()
+        score_sql, score_params = compiler.compile(score)
+        created_at_sql, created_at_params = compiler.compile(created_at)
+        sql = ('CAST(SIGN({score}) * LOG(GREATEST(ABS({score}), 1))'
+               ' + (EXTRACT(EPOCH FROM {created_at}) - %s) / %s AS double precision)').format(
+                   score=score_sql, created_at=created_at_sql)
+        params = list(score_params) * 2 + list(created_at_params) + [HOT_EPOCH, HOT_GRAVITY]
+        return sql, params
+
+
+def update_hot_score(instance):
+    """Set hot score of a new object"""
+    type(instance).objects.filter(pk=instance.pk).update(hot_score=HotScore())
+
+
+def refresh_hot_scores(labels=RANKED_MODELS):
+    """Recompute drifted hot scores, returns {label: updated rows}"""
+    updated = {}
+    for label in labels:
+        updated[label] = apps.get_model(label).objects\
+            .filter(~Q(hot_score=HotScore()))\
+            .update(hot_score=HotScore())
+        if updated[label]:
+            logger.info('{}: {} hot scores refreshed'.format(label, updated[label]))
+    return updated
+
+
+class HotOrderingFilter(filters.OrderingFilter):
+    """OrderingFilter accepting `hot` alias, add `hot_score` to view ordering_fields"""
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if params:
+            fields = [param.strip() for param in params.split(',')]
+            fields = [ORDERING_ALIASES.get(field, field) for field in fields]
+            ordering = self.remove_invalid_fields(queryset, fields, view, request)
+            if ordering:
+                return ordering
+        return self.get_default_ordering(view)
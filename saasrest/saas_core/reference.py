@@ -0,0 +1,127 @@
+"""
+Process local cache of small reference tables (locations, districts,
+categories, tags)
+
+Rows are kept in bounded LRU maps per worker. Cross-worker invalidation
+uses model generation counters of saas_core.cache (bumped on every
+post_save/post_delete), checked at most every VERSION_CHECK_INTERVAL.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.apps import apps
+from django.db import DatabaseError
+
+from saas_core.cache import get_model_cache_name
+from saas_core.utils import get_cache_version
+
+logger = logging.getLogger(__name__)
+
+VERSION_CHECK_INTERVAL = 5
+
+
+class ReferenceCache:
+    """LRU of model instances keyed by (lookup field, value)"""
+
+    def __init__(self, label, fields=('pk', ), maxsize=1000):
+        self.label = label
+        # lookup fields filled on warm up
+        self.fields = fields
+        self.maxsize = maxsize
+        self.lock = threading.RLock()
+        self.items = OrderedDict()
+        self.version = None
+        self.checked_at = 0
+
+    @property
+    def model(self):
+        return apps.get_model(self.label)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+            self.checked_at = 0
+
+    def check_version(self):
+        now = time.monotonic()
+        if now - self.checked_at < VERSION_CHECK_INTERVAL:
+            return
+        version = get_cache_version(get_model_cache_name(self.label))
+        with self.lock:
+            if version != self.version:
+                self.items.clear()
+                self.version = version
+            self.checked_at = now
+
+    def normalize(self, field, value):
+        """Lookup value as stored in db (e.g. lower case tag names)"""
+        if field == 'pk':
+            return int(value)
+        return self.model._meta.get_field(field).get_prep_value(value)
+
+    def put(self, instance):
+        with self.lock:
+            for field in self.fields:
+                key = (field, getattr(instance, field))
+                self.items[key] = instance
+                self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def get_many(self, field, values):
+        """{normalized value: instance}, misses are fetched in one query"""
+        self.check_version()
+        values = {self.normalize(field, value) for value in values}
+        result = {}
+        with self.lock:
+            for value in values:
+                key = (field, value)
+                if key in self.items:
+                    self.items.move_to_end(key)
+                    result[value] = self.items[key]
+
+        missing = values.difference(result)
+        if missing:
+            for instance in self.model.objects.filter(**{'{}__in'.format(field): missing}):
+                result[getattr(instance, field)] = instance
+                self.put(instance)
+        return result
+
+    def get(self, field, value):
+        return self.get_many(field, [value]).get(self.normalize(field, value))
+
+    def warm_up(self):
+        self.check_version()
+        for instance in self.model.objects.all()[:self.maxsize // len(self.fields)]:
+            self.put(instance)
+
+
+LOCATIONS = ReferenceCache('locations.location', maxsize=10000)
+DISTRICTS = ReferenceCache('locations.district', fields=('oblast', ), maxsize=100)
+CATEGORIES = ReferenceCache('categories.category', fields=('pk', 'name'), maxsize=500)
+TAGS = ReferenceCache('tags.tag', fields=('pk', 'name'), maxsize=5000)
+
+REFERENCE_CACHES = {reference_cache.label: reference_cache
+                    for reference_cache in (LOCATIONS, DISTRICTS, CATEGORIES, TAGS)}
+
+
+def invalidate_reference_cache(label):
+    """Drop local rows of a model changed in this process"""
+    if label in REFERENCE_CACHES:
+        REFERENCE_CACHES[label].clear()
+
+
+def warm_up():
+    """Load reference tables at worker start"""
+    started = time.monotonic()
+    try:
+        for reference_cache in REFERENCE_CACHES.values():
+            reference_cache.warm_up()
+    except DatabaseError as e:
+        # e.g. not migrated yet
+        logger.warning('Reference cache warm up failed: {}'.format(e))
+        return
+    logger.info('Reference cache warmed up in {:.1f}ms'.format(
+        (time.monotonic() - started) * 1000))
@@ -0,0 +1,84 @@
+"""
+Full text search helpers
+
+Models keep a `search_vector` (tsvector) column which is refreshed on save,
+views use `FullTextSearchFilter` instead of drf `SearchFilter`
+"""
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F
+from rest_framework import filters
+
+# text search configurations used for every indexed document
+SEARCH_CONFIGS = settings.SEARCH_CONFIGS
+
+SEARCH_TERM_RE = re.compile(r'\w+')
+
+
+def build_search_vector(weighted_fields):
+    """
+    Build search vector expression
+
+    weighted_fields: (('title', 'A'), ('description', 'B'))
+    """
+    vector = None
+    for config in SEARCH_CONFIGS:
+        for field_name, weight in weighted_fields:
+            part = SearchVector(field_name, weight=weight, config=config)
+            vector = part if vector is None else vector + part
+    return vector
+
+
+def build_search_query(text):
+    """Prefix search query (every term as `term:*`) for all configurations"""
+    terms = SEARCH_TERM_RE.findall(text.lower())
+    if not terms:
+        return None
+
+    raw_query = ' & '.join('{}:*'.format(term) for term in terms)
+    query = None
+    for config in SEARCH_CONFIGS:
+        part = SearchQuery(raw_query, config=config, search_type='raw')
+        query = part if query is None else query | part
+    return query
+
+
+def update_search_vector(instance, weighted_fields, update_fields=None):
+    """Refresh search vector of an instance (use in post_save)"""
+    if update_fields is not None:
+        indexed = {field_name for field_name, weight in weighted_fields}
+        if not indexed.intersection(update_fields):
+            return
+    type(instance).objects.filter(pk=instance.pk)\
+        .update(search_vector=build_search_vector(weighted_fields))
+
+
+def search_queryset(queryset, text, field_name='search_vector'):
+    """Filter and rank queryset by search text"""
+    query = build_search_query(text)
+    if query is None:
+        return queryset
+
+    ordering = queryset.query.order_by
+    return queryset.filter(**{field_name: query})\
+        .annotate(search_rank=SearchRank(F(field_name), query))\
+        .order_by('-search_rank', *ordering)
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    Drop-in replacement of drf SearchFilter (same `search` query param)
+
+    View have to provide `search_vector_field`, otherwise falls back
+    to default ILIKE search over `search_fields`
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        field_name = getattr(view, 'search_vector_field', None)
+        if not field_name:
+            return super().filter_queryset(request, queryset, view)
+
+        text = request.query_params.get(self.search_param, '')
+        return search_queryset(queryset, text.replace('\x00', ''), field_name)
@@ -1,25 +1,245 @@
+import hashlib
+import json
+from collections import OrderedDict
+
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 
-from django.core.exceptions import ObjectDoesNotExist
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.urls import reverse
 from django.utils.encoding import smart_text
+from django.utils.translation import get_language
+
+from authentication.serializers import AuthorsListSerializer, serialize_simple_user
+from votes.serializers import VoteSerializer
 
+from .cache import bump_model_version, get_model_cache_name
+from .images_compression import VARIANT_FORMATS, VARIANTS
 from .models import Image
+from .utils import get_cache_versions
+
+# cached item representations, see CachedRepresentationListSerializer
+REPRESENTATION_CACHE_TIMEOUT = 60 * 60
 
-class CreatableSlugRelatedField(serializers.SlugRelatedField):
+
+class ReferenceSlugRelatedField(serializers.SlugRelatedField):
+    """SlugRelatedField resolved by process local reference cache (saas_core.reference)"""
+
+    def __init__(self, reference_cache=None, **kwargs):
+        self.reference_cache = reference_cache
+        super().__init__(**kwargs)
 
     def to_internal_value(self, data):
+        if self.reference_cache is None:
+            return super().to_internal_value(data)
         try:
-            return self.get_queryset().get_or_create(**{self.slug_field: data})[0]
-        except ObjectDoesNotExist:
+            instance = self.reference_cache.get(self.slug_field, data)
+        except (TypeError, ValueError):
+            self.fail('invalid')
+        if instance is None:
             self.fail('does_not_exist', slug_name=self.slug_field,
                       value=smart_text(data))
+        return instance
+
+
+class CreatableManyRelatedField(serializers.ManyRelatedField):
+    """Resolves whole list of slugs at once"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        return self.child_relation.to_internal_value_many(data)
+
+
+class CreatableSlugRelatedField(ReferenceSlugRelatedField):
+    """
+    Slug field creating missing instances (e.g. tags)
+
+    With many=True all slugs are resolved with one IN query (or the reference
+    cache) and missing ones are inserted with a single bulk_create
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return CreatableManyRelatedField(**list_kwargs)
+
+    def get_existing(self, values):
+        """{slug: instance} of existing rows"""
+        if self.reference_cache is not None:
+            return self.reference_cache.get_many(self.slug_field, values)
+        queryset = self.get_queryset().filter(**{'{}__in'.format(self.slug_field): values})
+        return {getattr(instance, self.slug_field): instance for instance in queryset}
+
+    def to_internal_value_many(self, data):
+        model = self.get_queryset().model
+        field = model._meta.get_field(self.slug_field)
+        try:
+            # normalize as stored in db (LowerTextField lowercases), keep order
+            values = list(OrderedDict.fromkeys(field.get_prep_value(value) for value in data))
         except (TypeError, ValueError):
             self.fail('invalid')
 
+        instances = self.get_existing(values)
+        missing = [value for value in values if value not in instances]
+        if missing:
+            # concurrent requests may insert the same slugs, fetch them after insert
+            model.objects.bulk_create([model(**{self.slug_field: value}) for value in missing],
+                                      ignore_conflicts=True)
+            # bulk_create skips post_save
+            bump_model_version(model._meta.label_lower)
+            instances.update(self.get_existing(missing))
+
+        for value in values:
+            if value not in instances:
+                self.fail('does_not_exist', slug_name=self.slug_field,
+                          value=smart_text(value))
+        return [instances[value] for value in values]
+
+    def to_internal_value(self, data):
+        return self.to_internal_value_many([data])[0]
+
 
 class ImageSerializer(serializers.HyperlinkedModelSerializer):
     """image serializer"""
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = Image
-        fields = ('id', 'url', 'image', )
+        fields = ('id', 'url', 'image', 'status', 'srcset', )
         read_only_fields = fields
+
+    def get_srcset(self, instance):
+        """
+        {variant: {'width': .., 'webp': url, 'jpeg': url}}
+
+        Missing variants point to the lazy generation endpoint
+        """
+        request = self.context.get('request')
+        storage = instance.image.storage
+        lazy_url = reverse('image-variant', args=[instance.pk])
+        if request:
+            lazy_url = request.build_absolute_uri(lazy_url)
+
+        srcset = {}
+        for variant, width in VARIANTS.items():
+            srcset[variant] = {'width': width}
+            for image_format in VARIANT_FORMATS:
+                name = instance.variants.get('{}.{}'.format(variant, image_format))
+                srcset[variant][image_format] = storage.url(name) if name else \
+                    '{}?variant={}&format={}'.format(lazy_url, variant, image_format)
+        return srcset
+
+
+class UserOverlayMixin:
+    """
+    Splits item representation into shared and per-user parts
+    (see CachedRepresentationListSerializer)
+
+    Item models have to provide `author_id`
+    """
+    # fields depending on the viewer, never cached
+    user_fields = ('current_user_vote', 'is_owner')
+    # cached representation changes with these instance fields (and properties,
+    # `is_promoted` depends on the clock)...
+    representation_version_fields = ('updated_at', 'score', 'up_votes_count',
+                                     'down_votes_count', 'favorites_count', 'is_promoted')
+    # ...and with generations of these models (see saas_core.cache)
+    representation_cache_models = ()
+
+    def skip_user_fields(self):
+        return self.context.get('skip_user_fields', False)
+
+    def get_is_owner(self, instance):
+        if self.skip_user_fields():
+            return None
+        request = self.context.get('request')
+        return bool(request and request.user.is_authenticated and
+                    instance.author_id == request.user.id)
+
+    def get_representation_cache_key(self, instance, versions):
+        request = self.context['request']
+        state = [getattr(instance, field, None) for field in self.representation_version_fields]
+        raw_key = json.dumps([type(self).__name__, instance.pk, state, versions,
+                              request.get_host(), get_language()], default=str)
+        return 'SERIALIZED_{}_{}'.format(
+            instance._meta.label_lower, hashlib.md5(raw_key.encode('utf-8')).hexdigest())
+
+    def get_user_overlay(self, instances):
+        """{pk: {user field: value}} for a page, votes in one query"""
+        overlay = {instance.pk: {'current_user_vote': None, 'is_owner': False}
+                   for instance in instances}
+        request = self.context.get('request')
+        if not instances or not request or not request.user.is_authenticated:
+            return overlay
+
+        content_type = ContentType.objects.get_for_model(type(instances[0]))
+        votes = request.user.votes.filter(content_type=content_type, object_id__in=list(overlay))
+        for vote in votes:
+            overlay[vote.object_id]['current_user_vote'] = VoteSerializer(
+                vote, many=False, context=self.context).data
+        for instance in instances:
+            overlay[instance.pk]['is_owner'] = instance.author_id == request.user.id
+        return overlay
+
+
+class CachedRepresentationListSerializer(AuthorsListSerializer):
+    """
+    Two-layer list rendering
+
+    User independent item representations are cached per object version
+    (one get_many per page), per-user fields are merged at response time
+    """
+
+    def warm_up(self, items):
+        # services and seekings show authors for plain querysets only, not for pages
+        if not isinstance(self.instance, list):
+            self.warm_up_authors(items)
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, 'all') else data)
+        if not self.context.get('request') or not items:
+            return super().to_representation(items)
+        self.warm_up(items)
+
+        versions = get_cache_versions([get_model_cache_name(label)
+                                       for label in self.child.representation_cache_models])
+        keys = {item.pk: self.child.get_representation_cache_key(item, versions) for item in items}
+        cached = cache.get_many(list(keys.values()))
+
+        missing = {}
+        self.context['skip_user_fields'] = True
+        try:
+            for item in items:
+                if keys[item.pk] not in cached:
+                    missing[keys[item.pk]] = self.child.to_representation(item)
+        finally:
+            self.context['skip_user_fields'] = False
+        if missing:
+            cache.set_many(missing, REPRESENTATION_CACHE_TIMEOUT)
+            cached.update(missing)
+
+        overlay = self.child.get_user_overlay(items)
+        result = []
+        for item in items:
+            representation = cached[keys[item.pk]]
+            representation.update(overlay[item.pk])
+            if isinstance(representation.get('author'), dict):
+                # author online status is fresher than cached items
+                representation['author'] = serialize_simple_user(
+                    user_id=item.author_id, many=False, context=self.context)
+            result.append(representation)
+        return result
+
+
+class CachedAuthorsListSerializer(CachedRepresentationListSerializer):
+    """Cached list rendering of items showing authors on every page (feed posts)"""
+
+    def warm_up(self, items):
+        self.warm_up_authors(items)
@@ -0,0 +1,50 @@
+"""Saas core tasks"""
+import logging
+
+from asgiref.sync import async_to_sync
+from celery import shared_task
+
+from .cache import bump_model_version
+from .images_compression import compress_field_file
+from .models import Image
+from . import ranking
+from .serializers import ImageSerializer
+from .utils import send_group_events
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def process_image(image_id):
+    """Compress uploaded image and notify its author"""
+    try:
+        image = Image.objects.get(pk=image_id)
+    except Image.DoesNotExist:
+        return
+
+    try:
+        name = compress_field_file(image.image)
+        image.generate_variants()
+        status = Image.READY
+    except Exception as e:
+        logger.error('Image #{} processing failed: {}'.format(image_id, e))
+        name = image.image.name
+        status = Image.FAILED
+    # queryset update, so save() does not schedule processing again
+    Image.objects.filter(pk=image_id).update(image=name, status=status, variants=image.variants)
+    image.status = status
+    bump_model_version('saas_core.image')
+
+    author_id = getattr(image.content_object, 'author_id', None)
+    if author_id:
+        serializer = ImageSerializer(image, many=False, context={'request': None})
+        async_to_sync(send_group_events)([('user_%s' % author_id, {
+            "type": "image_processed",
+            "payload": serializer.data,
+        })])
+
+
+@shared_task
+def refresh_hot_scores():
+    """Safety net for scores changed outside of votes signals"""
+    return ranking.refresh_hot_scores()
@@ -1,3 +1,84 @@
+import json
+from base64 import urlsafe_b64encode as b64encode
+from urllib.parse import parse_qs, urlparse
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from authentication.models import User
+from services.models import Service
+
+from .paginations import KeysetPagination
+
+factory = APIRequestFactory()
+
+
+def get_request(url='/services/', **params):
+    return Request(factory.get(url, params))
+
+
+def get_cursor(link):
+    return parse_qs(urlparse(link).query)['cursor'][0]
+
+
+def make_cursor(data):
+    return b64encode(json.dumps(data).encode('utf-8')).decode('ascii')
+
+
+class KeysetPaginationTest(TestCase):
+
+    def setUp(self):
+        author = User.objects.create_user('author@example.com', 'password')
+        for index in range(5):
+            Service.objects.create(author=author, title='Service {}'.format(index), price=10)
+        # same ordering value everywhere, pages are split by id only
+        Service.objects.update(created_at=timezone.now())
+        self.queryset = Service.objects.order_by('-created_at')
+
+    def paginate(self, **params):
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(self.queryset, get_request(page_size=2, **params))
+        return paginator, [service.pk for service in page]
+
+    def test_duplicate_values_across_pages(self):
+        expected = list(self.queryset.order_by('-created_at', '-id').values_list('pk', flat=True))
+        paginator, ids = self.paginate(cursor='')
+        pages = [ids]
+        while paginator.get_next_link():
+            paginator, ids = self.paginate(cursor=get_cursor(paginator.get_next_link()))
+            pages.append(ids)
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), expected)
+
+        # and back from the last page
+        paginator, ids = self.paginate(cursor=get_cursor(paginator.get_previous_link()))
+        self.assertEqual(ids, pages[1])
+
+    def test_invalid_cursor(self):
+        cursors = [
+            'not a cursor',
+            'é',
+            b64encode(b'not json').decode('ascii'),
+            make_cursor([1, 2, 3]),
+            make_cursor({'v': {'x': 1}, 'id': 1, 'r': False}),
+            make_cursor({'v': 'not a date', 'id': 1, 'r': False}),
+            make_cursor({'v': timezone.now().isoformat(), 'id': 'x', 'r': False}),
+            make_cursor({'v': timezone.now().isoformat(), 'id': 2 ** 40, 'r': False}),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(ValidationError) as context:
+                    self.paginate(cursor=cursor)
+                self.assertEqual(context.exception.status_code, 400)
 
-# Create your tests here.
+    def test_page_numbers(self):
+        paginator, ids = self.paginate(page=2)
+        self.assertFalse(paginator.keyset)
+        self.assertEqual(len(ids), 2)
+        response = paginator.get_paginated_response([])
+        self.assertEqual(response.data['page'], 2)
+        self.assertEqual(response.data['pages'], 3)
+        self.assertEqual(response.data['count'], 5)
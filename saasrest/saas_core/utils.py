@@ -1,3 +1,5 @@
+import asyncio
+import time
 
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
@@ -5,62 +7,19 @@ from channels.layers import get_channel_layer
 
 from django.urls import resolve
 
-from notifications.models import Notification
 from django.core.cache import cache
 
 from django.utils.translation import ugettext as _
 
 
-@database_sync_to_async
-def does_notification_exists(user, conversation, notified):
-    return Notification.objects.filter(recipient=user, conversation_id=conversation.id, notified=notified).exists()
-
-
-@database_sync_to_async
-def create_notification(recipient, conversation, title, text, redirect_url):
-    return Notification.objects.create(recipient=recipient, conversation=conversation,
-                                       title=title, text=text, redirect_url=redirect_url)
-
-
-async def broadcast_message(msg, serializer_data):
-    group_name = 'chat_%s' % msg.conversation.id
+async def send_group_events(events):
+    """Send [(group_name, content), ...] concurrently"""
     channel_layer = get_channel_layer()
-    content = {
-        "type": "new_message",
-        "payload": serializer_data,
-    }
-    await channel_layer.group_send(group_name, {
-        "type": "notify",
-        "content": content,
-    })
-    # create notification if user if offlie
-    for user in msg.conversation.users.exclude(id=msg.author.id).all():
-        # if user.is_online:
-        exists = await does_notification_exists(user, msg.conversation, False)
-        if not exists:
-            n = await create_notification(recipient=user, conversation=msg.conversation,
-                                          title="New Message from {}".format(
-                                              msg.author.first_name),
-                                          text="{}".format(msg.get_text()),
-                                          redirect_url="/messages/c/{}".format(msg.conversation.id))
-        else:
-            s_data = {
-                'recipient_id': user.id,
-                'conversation_id': msg.conversation.id,
-                'title': "New Message from {}".format(msg.author.first_name),
-                'text': msg.get_text(),
-                'type': 'info',
-                'redirect_url': "/messages/c/{}".format(msg.conversation.id)
-            }
-            await notify_user(user.id, s_data)
-        # else:
-        #     n = await create_notification(recipient=user, conversation=msg.conversation,
-        #                                   title="New Message from {}".format(
-        #                                       msg.author.first_name),
-        #                                   text="{}".format(msg.text),
-        #                                   redirect_url="/messages/c/{}".format(msg.conversation.id))
-            # s = serializers.NotificationSerializer(n, many=False, context={'request': None})
-            # await notify_user(user.id, s.data)
+    await asyncio.gather(*[
+        channel_layer.group_send(group_name, {
+            "type": "notify",
+            "content": content,
+        }) for group_name, content in events])
 
 
 async def broadcast_deleted_message(conversationId, msgId):
@@ -76,51 +35,42 @@ async def broadcast_deleted_message(conversationId, msgId):
     })
 
 
-async def send_group_notification(group_name, notification):
-    channel_layer = get_channel_layer()
-    content = {
-        "type": "notification",
-        "payload": notification,
-    }
-    await channel_layer.group_send(group_name, {
-        "type": "notify",
-        "content": content,
-    })
-
-
-async def notify_user(user_id, notification_serializer_data):
-    channel_layer = get_channel_layer()
-    await send_group_notification('user_%s' % user_id, notification_serializer_data)
-
-"""
-TODO: rename
-
-flow:
-- try to get result from context
-- try to get from cache
-- serialize, set to cache (for next requests) and set to context (for current request)
-
-"""
-
-
-def cached_or_new(key, serializer_class, instance, object_property_name, context, many=False):
-    # try to get from context
-    context_result = context.get(key)
-    if context_result:
-        return context_result
+def get_cache_version_key(name):
+    return 'CACHE_VERSION_{}'.format(name)
 
-    # try to get from cache
-    result = cache.get(key)
-    if result is None:
-        # ok, lets serialize and save serialized thing in our cache
-        obj = getattr(instance, object_property_name, False)
-        result = serializer_class(obj, many=many, context=context).data
-        cache.set(key, result)
 
-    # save in context for current request processing
-    context[key] = result
-
-    return result
+def get_cache_version(name):
+    """
+    Get generation counter used as a part of cache keys
+    (see `bump_cache_version`)
+    """
+    key = get_cache_version_key(name)
+    version = cache.get(key)
+    if version is None:
+        # start from current timestamp, so evicted counter
+        # never returns an old generation
+        cache.add(key, int(time.time()), None)
+        version = cache.get(key, int(time.time()))
+    return version
+
+
+def get_cache_versions(names):
+    """`get_cache_version` for many names with one cache round trip"""
+    keys = {name: get_cache_version_key(name) for name in names}
+    versions = cache.get_many(list(keys.values()))
+    return [versions[keys[name]] if keys[name] in versions else get_cache_version(name)
+            for name in names]
+
+
+def bump_cache_version(name):
+    """Invalidate all cache keys built with `get_cache_version(name)`"""
+    key = get_cache_version_key(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # no counter yet
+        cache.set(key, int(time.time()), None)
+        return cache.get(key)
 
 
 def get_obj_from_url(self, url):
@@ -1,7 +1,12 @@
+from django.http import HttpResponseRedirect
 from django.shortcuts import render
-from rest_framework import viewsets
+from django.utils.translation import ugettext as _
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 
+from .images_compression import VARIANT_FORMATS, VARIANTS
 from .models import Image
 from .permissions import IsOwnerOrReadOnly
 from .serializers import ImageSerializer
@@ -16,3 +21,16 @@ class ImageViewSet(viewsets.ModelViewSet):
     queryset = Image.objects.all()
     serializer_class = ImageSerializer
     permission_classes = DEFAULT_PERMISSION_CLASSES + [IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly, ]
+
+    # srcset urls are loaded by browsers directly, no api key header
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticatedOrReadOnly, ])
+    def variant(self, request, pk=None):
+        """Redirect to image variant, generate it on first request"""
+        variant = request.query_params.get('variant', 'medium')
+        image_format = request.query_params.get('format', 'jpeg')
+        if variant not in VARIANTS or image_format not in VARIANT_FORMATS:
+            return Response({'detail': _("Unknown image variant.")}, status=status.HTTP_400_BAD_REQUEST)
+
+        image = self.get_object()
+        name = image.get_variant(variant, image_format)
+        return HttpResponseRedirect(image.image.storage.url(name))
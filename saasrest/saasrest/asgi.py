@@ -5,34 +5,35 @@ from django.conf.urls import url
 
 from messaging.consumers import ChatConsumer
 
-from channels.auth import AuthMiddlewareStack
-# from rest_framework.authtoken.models import Token
+from channels.auth import UserLazyObject
+from channels.middleware import BaseMiddleware
 from django.contrib.auth.models import AnonymousUser
 
-from oauth2_provider.models import AccessToken
+from authentication.tokens import resolve_token_user
 from asgi_cors import asgi_cors
 
-class TokenAuthMiddleware:
+class TokenAuthMiddleware(BaseMiddleware):
     """
     Token authorization middleware for Django Channels 2
-    """
 
-    def __init__(self, inner):
-        self.inner = inner
+    Token is resolved in `resolve_scope` (async, cached), so the handshake
+    does not block the event loop. Has to be inside AuthMiddlewareStack,
+    otherwise session user would replace the token user.
+    """
 
-    def __call__(self, scope):
+    def populate_scope(self, scope):
         headers = dict(scope['headers'])
         if b'sec-websocket-protocol' in headers:
-            try:
-                token_key = headers[b'sec-websocket-protocol'].decode()
-                token = AccessToken.objects.get(token=token_key)
-                scope['user'] = token.user
-                scope['token'] = token
-            except AccessToken.DoesNotExist:
-                scope['user'] = AnonymousUser()
-        return self.inner(scope)
+            scope['token'] = headers[b'sec-websocket-protocol'].decode()
+            scope['user'] = UserLazyObject()
+
+    async def resolve_scope(self, scope):
+        if 'token' not in scope:
+            return
+        user, access_token = await resolve_token_user(scope['token'])
+        scope['user']._wrapped = user or AnonymousUser()
 
-TokenAuthMiddlewareStack = lambda inner: TokenAuthMiddleware(AuthMiddlewareStack(inner))
+TokenAuthMiddlewareStack = lambda inner: AuthMiddlewareStack(TokenAuthMiddleware(inner))
 
 websocket_urlpatterns = [
     url(r'^saas_ws/global/$', ChatConsumer),
@@ -47,3 +48,8 @@ application = ProtocolTypeRouter({
     ),
 })
 
+# load small reference tables into process memory
+from saas_core.reference import warm_up  # noqa
+warm_up()
+from locations.places import warm_up as warm_up_places  # noqa
+warm_up_places()
@@ -11,8 +11,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'saasrest.settings.main')
 
 django.setup()
 # broker url will be loaded from settings configuration
-app = Celery('saasrest',
-             include=['api'])
+app = Celery('saasrest')
 
 # Using a string here means the worker doesn't have to serialize
 # the configuration object to child processes.
@@ -72,6 +72,20 @@ REDIS_HOST = os.environ.get('REDIS_HOST')
 REDIS_PORT = os.environ.get('REDIS_PORT')
 REDIS_HOSTS = ['redis://{}:{}'.format(REDIS_HOST, REDIS_PORT)]
 
+# Celery
+CELERY_BROKER_URL = os.environ.get(
+    'CELERY_BROKER_URL', 'redis://{}:{}/2'.format(REDIS_HOST, REDIS_PORT))
+
+# Presence (online users), use saas_core.presence.InMemoryPresence for tests
+PRESENCE_BACKEND = os.environ.get(
+    'PRESENCE_BACKEND', 'saas_core.presence.RedisPresence')
+PRESENCE_REDIS_URL = os.environ.get(
+    'PRESENCE_REDIS_URL', 'redis://{}:{}/1'.format(REDIS_HOST, REDIS_PORT))
+
+# Home timelines of feed, see feed.timeline
+TIMELINE_REDIS_URL = os.environ.get(
+    'TIMELINE_REDIS_URL', 'redis://{}:{}/3'.format(REDIS_HOST, REDIS_PORT))
+
 STRIPE_LIVE_PUBLIC_KEY = os.environ.get('STRIPE_LIVE_PUBLIC_KEY')
 STRIPE_LIVE_SECRET_KEY = os.environ.get('STRIPE_LIVE_SECRET_KEY')
 STRIPE_TEST_PUBLIC_KEY = os.environ.get('STRIPE_TEST_PUBLIC_KEY')
@@ -94,6 +108,11 @@ EMAIL_FROM_USER = os.environ.get('EMAIL_FROM_USER')
 # Cache
 MEMCACHED_LOCATION = os.environ.get('MEMCACHED_LOCATION')
 
+# Full text search
+# postgres does not ship a bulgarian stemmer: cyrillic words are indexed with
+# the 'simple' configuration, add 'bulgarian' here once such config is installed
+SEARCH_CONFIGS = os.environ.get('SEARCH_CONFIGS', 'english,simple').split(',')
+
 # Static files
 STATIC_URL = os.environ.get('DEV_STATIC_URL', '/saas_api/static/')
 
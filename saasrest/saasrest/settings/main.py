@@ -66,6 +66,27 @@ else:
 # CELERY_TIMEZONE = 'UTC'
 # CELERY_ENABLE_UTC = True
 # CELERY_TIMEZONE = 'Europe/Sofia'
+CELERY_BEAT_SCHEDULE = {
+    'flush-last-active': {
+        'task': 'authentication.tasks.flush_last_active',
+        'schedule': 60.0,
+    },
+    'refresh-hot-scores': {
+        'task': 'saas_core.tasks.refresh_hot_scores',
+        'schedule': 60.0 * 60,
+    },
+    'update-tag-usage-counts': {
+        'task': 'tags.tasks.update_usage_counts',
+        'schedule': 60.0 * 10,
+    },
+    'prune-notifications': {
+        'task': 'notifications.tasks.prune_notifications',
+        'schedule': 60.0 * 60 * 24,
+    },
+}
+
+# websocket connection expiration (seconds), see saas_core.presence
+PRESENCE_TIMEOUT = 90
 
 # Middlewares
 MIDDLEWARE = [
@@ -1,9 +1,11 @@
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
-        "rest_framework_api_key.permissions.HasAPIKey",
+        # cached rest_framework_api_key HasAPIKey
+        "saas_core.permissions.HasCachedAPIKey",
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'oauth2_provider.contrib.rest_framework.OAuth2Authentication',
+        # cached oauth2_provider OAuth2Authentication
+        'authentication.tokens.CachedOAuth2Authentication',
         'rest_framework_social_oauth2.authentication.SocialAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'saas_core.paginations.MyPagination',
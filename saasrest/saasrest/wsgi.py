@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'saasrest.settings.main')
 
 application = get_wsgi_application()
+
+# load small reference tables into process memory
+from saas_core.reference import warm_up  # noqa
+warm_up()
+from locations.places import warm_up as warm_up_places  # noqa
+warm_up_places()
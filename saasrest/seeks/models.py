@@ -2,20 +2,24 @@ from djmoney.models.fields import MoneyField
 from colorfield.fields import ColorField
 from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
-from django.db.models.signals import post_delete
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.timezone import now
 
-from authentication.models import User
+from authentication.models import User, update_users_counter
 from categories.models import Category
 from locations.models import Location
 from tags.models import Tag
 from votes.models import Vote
 
 from saas_core.models import Image
+from saas_core.promotions import invalidate_promotion_pools
+from saas_core.search import update_search_vector
 
 import logging
 logger = logging.getLogger(__name__)
@@ -43,12 +47,31 @@ class Seeking(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     score = models.IntegerField(default=0)
+    # time decayed score, see saas_core.ranking
+    hot_score = models.FloatField(default=0)
+    # denormalized vote counters, maintained by votes signals
+    up_votes_count = models.IntegerField(default=0)
+    down_votes_count = models.IntegerField(default=0)
+    favorites_count = models.IntegerField(default=0)
     votes = GenericRelation(Vote)
     images = GenericRelation(Image)
     max_price = MoneyField(max_digits=14, decimal_places=2, default_currency='USD')
 
     promoted_til = models.DateTimeField(null=True, blank=True)
 
+    # full text search document, see `update_seeking_search_vector`
+    search_vector = SearchVectorField(null=True, editable=False)
+    SEARCH_FIELDS = (('title', 'A'), ('description', 'B'))
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector']),
+            # keyset pagination
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['-score', '-id']),
+            models.Index(fields=['-hot_score', '-id']),
+        ]
+
     def likes(self):
         return self.votes.filter(activity_type=Vote.UP_VOTE)
 
@@ -64,7 +87,7 @@ class Seeking(models.Model):
     def get_absolute_url(self):
         return reverse('seeking-detail', args=[str(self.id)])
 
-    def promote(self, user, intent_id, days):
+    def promote(self, user, intent_id, days, weight=1):
         logger.info('Trying to promote seek #{}, intent_id: {}'.format(self.pk, intent_id))
 
         current_datetime = timezone.now()
@@ -76,6 +99,7 @@ class Seeking(models.Model):
             countdown_datetime = seeking_promotion.end_datetime if seeking_promotion.end_datetime > current_datetime else current_datetime
             seeking_promotion.end_datetime = countdown_datetime + \
                 timezone.timedelta(days=days)
+            seeking_promotion.weight = max(seeking_promotion.weight, weight)
 
             if intent_id:
                 seeking_promotion.stripe_payment_intents.append(intent_id)
@@ -92,7 +116,8 @@ class Seeking(models.Model):
                 seeking_promotion = SeekingPromotion.objects.create(
                     author=user, seeking=self,
                     stripe_payment_intents=[intent_id],
-                    end_datetime=end_datetime)
+                    end_datetime=end_datetime,
+                    weight=weight)
             except Exception as e:
                 logger.error(str(e))
             else:
@@ -107,11 +132,28 @@ class Seeking(models.Model):
         else:
             logger.info("Successfully changed promoted_til field")
 
-
+        invalidate_promotion_pools(SeekingPromotion.POOL_NAME)
         logger.info("Successfully promoted seek #{} til {}".format(self.pk, str(self.promoted_til)))
         return seeking_promotion
 
 
+@receiver(post_save, sender=Seeking, dispatch_uid='seeking_author_counter_post_save_signal')
+def increment_author_seekings_count(sender, instance, created, **kwargs):
+    if created:
+        update_users_counter([instance.author_id], 'seekings_count', 1)
+
+
+@receiver(post_delete, sender=Seeking, dispatch_uid='seeking_author_counter_post_delete_signal')
+def decrement_author_seekings_count(sender, instance, **kwargs):
+    update_users_counter([instance.author_id], 'seekings_count', -1)
+
+
+@receiver(post_save, sender=Seeking, dispatch_uid='seeking_search_vector_signal')
+def update_seeking_search_vector(sender, instance, update_fields=None, **kwargs):
+    """Keep search vector up to date"""
+    update_search_vector(instance, Seeking.SEARCH_FIELDS, update_fields)
+
+
 class SeekingPromotion(models.Model):
     """Seeking promotion"""
     author = models.ForeignKey(User, on_delete=models.SET_NULL,
@@ -123,6 +165,9 @@ class SeekingPromotion(models.Model):
 
     stripe_payment_intents = ArrayField(models.CharField(max_length=110))
 
+    # rotation weight (depends on payment plan)
+    weight = models.PositiveSmallIntegerField(default=1)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -130,3 +175,5 @@ class SeekingPromotion(models.Model):
     def is_valid(self):
         """is valid promotion"""
         return self.end_datetime > now()
+
+    POOL_NAME = 'SEEKING_PROMOTIONS'
@@ -4,19 +4,22 @@ from rest_framework import serializers
 
 from authentication.serializers import serialize_simple_user
 from categories.models import Category
-from locations.serializers import LocationSerializer
-from saas_core.serializers import CreatableSlugRelatedField
-from saas_core.utils import cached_or_new
+from locations.serializers import serialize_location
+from saas_core.reference import CATEGORIES, TAGS
+from saas_core.serializers import CreatableSlugRelatedField, ReferenceSlugRelatedField
 from tags.models import Tag
 from votes.serializers import VoteSerializer
 
 from .models import Seeking, SeekingPromotion
 
 from saas_core.models import Image
-from saas_core.serializers import ImageSerializer
+from saas_core.serializers import (CachedRepresentationListSerializer, ImageSerializer,
+                                   UserOverlayMixin)
 
-class SeekingSerializer(serializers.HyperlinkedModelSerializer):
+class SeekingSerializer(UserOverlayMixin, serializers.HyperlinkedModelSerializer):
     """Seeking serializer"""
+    representation_cache_models = ('saas_core.image', 'tags.tag', 'categories.category', 'locations.location')
+
     images = ImageSerializer(
         many=True,
         read_only=True)
@@ -27,21 +30,24 @@ class SeekingSerializer(serializers.HyperlinkedModelSerializer):
     tags = CreatableSlugRelatedField(
         many=True,
         queryset=Tag.objects,
-        slug_field='name'
+        slug_field='name',
+        reference_cache=TAGS
     )
 
-    category = serializers.SlugRelatedField(
+    category = ReferenceSlugRelatedField(
         many=False,
         queryset=Category.objects,
-        slug_field='name'
+        slug_field='name',
+        reference_cache=CATEGORIES
     )
 
     current_user_vote = serializers.SerializerMethodField()
+    is_owner = serializers.SerializerMethodField()
 
     def get_current_user_vote(self, instance):
         """Current user vote on serialization"""
         user = self.get_current_user()
-        if not user or user.is_anonymous:
+        if not user or user.is_anonymous or self.skip_user_fields():
             return None
 
         if not isinstance(self.instance, list):
@@ -72,12 +78,15 @@ class SeekingSerializer(serializers.HyperlinkedModelSerializer):
 
     class Meta:
         model = Seeking
+        list_serializer_class = CachedRepresentationListSerializer
         fields = ('id', 'url', 'author', 'title', 'description', 'max_price', 'max_price_currency', 'contact_phone', 'color', 'location',
                   'images', 'promoted_til', 'is_promoted', 'created_at', 'updated_at',
-                  'tags', 'category', 'score', 'current_user_vote')
+                  'tags', 'category', 'score', 'up_votes_count', 'down_votes_count', 'favorites_count',
+                  'current_user_vote', 'is_owner')
         
         read_only_fields = ('id', 'url', 'created_at', 'updated_at', 'author',
-                            'images', 'score', 'current_user_vote')
+                            'images', 'score', 'up_votes_count', 'down_votes_count', 'favorites_count',
+                            'current_user_vote', 'is_owner')
         required_fields = ('title', 'description', 'location')
         extra_kwargs = {field: {'required': True} for field in required_fields}
 
@@ -130,8 +139,7 @@ class SeekingSerializer(serializers.HyperlinkedModelSerializer):
             # serialize tags and location
             response['tags'] = [{'name': tag.name, 'color': tag.color}
                                 for tag in instance.tags.all()]
-            response['location'] = cached_or_new('SERIALIZED_LOCATION_{}'.format(
-                instance.location_id), LocationSerializer, instance, 'location', self.context)
+            response['location'] = serialize_location(instance.location_id, self.context)
 
         return response
 
@@ -145,8 +153,7 @@ class ShortSeekingSerializer(SeekingSerializer):
             # serialize tags and location
             response['tags'] = [{'name': tag.name, 'color': tag.color}
                                 for tag in instance.tags.all()]
-            response['location'] = cached_or_new('SERIALIZED_LOCATION_{}'.format(
-                instance.location_id), LocationSerializer, instance, 'location', self.context)
+            response['location'] = serialize_location(instance.location_id, self.context)
         return response
 
 
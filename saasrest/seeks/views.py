@@ -1,6 +1,4 @@
 """Seekings views"""
-import random
-
 from django.core.exceptions import PermissionDenied
 from django.db.models import Q
 from django.utils import timezone
@@ -15,9 +13,12 @@ from rest_framework.response import Response
 
 from categories.models import Category
 from saas_core.permissions import IsAuthenticatedAndVerified
+from saas_core.promotions import get_filters_key, get_promotion_pool, weighted_sample
+from saas_core.search import FullTextSearchFilter, build_search_query
 from tags.models import Tag
 from votes.models import Vote
 from votes.serializers import VoteSerializer
+from votes.utils import create_vote
 
 from .models import Seeking, SeekingPromotion
 from .permissions import IsOwnerOrReadOnly
@@ -25,7 +26,11 @@ from .serializers import (SeekingPromotionSerializer,
                           SeekingSerializer)
 
 
+from saas_core.cache import SEEKS_MODELS, cache_response, refresh_authors, until_promotion_ends
 from saas_core.config import DEFAULT_PERMISSION_CLASSES
+from locations.geo import NearLocationFilter
+from saas_core.paginations import KeysetPagination
+from saas_core.ranking import HotOrderingFilter
 
 class SeekingFilter(django_rest_filters.FilterSet):
     """Custom filter for seekings"""
@@ -73,7 +78,7 @@ class SeekingViewSet(viewsets.ModelViewSet):
     """
     queryset = Seeking.objects\
         .prefetch_related('tags')\
-        .select_related('category').select_related('location')\
+        .select_related('category')\
         .order_by('-created_at')
         # .prefetch_related('images')\
         
@@ -81,19 +86,21 @@ class SeekingViewSet(viewsets.ModelViewSet):
 
     permission_classes = DEFAULT_PERMISSION_CLASSES + [IsOwnerOrReadOnly, ]
 
-    filter_backends = (filters.SearchFilter,
+    filter_backends = (FullTextSearchFilter,
                        django_rest_filters.DjangoFilterBackend,
-                       filters.OrderingFilter)
-    ordering_fields = ('created_at', 'score', 'max_price', )
+                       HotOrderingFilter,
+                       NearLocationFilter)
+    ordering_fields = ('created_at', 'score', 'hot_score', 'max_price', )
     search_fields = ('title', 'description', )
+    search_vector_field = 'search_vector'
     filter_class = SeekingFilter
+    pagination_class = KeysetPagination
 
-    # one minute cache
-    # @method_decorator(cache_page(60*1))
-    # @method_decorator(vary_on_cookie)
-    # def dispatch(self, *args, **kwargs):
-    #     return super(self.__class__, self).dispatch(*args, **kwargs)
+    @cache_response(*SEEKS_MODELS, timeout=until_promotion_ends, refresh=refresh_authors)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
+    @cache_response(*SEEKS_MODELS, timeout=until_promotion_ends, refresh=refresh_authors)
     def list(self, request, *args, **kwargs):
         """
         Custom list processing, exclude promoted seekings
@@ -129,10 +136,9 @@ class SeekingViewSet(viewsets.ModelViewSet):
     def vote(self, request, pk, votetype):
         if self.request.user:
             current_seeking = self.get_object()
-            if current_seeking.votes.filter(user=self.request.user).exists():
+            vote = create_vote(current_seeking, request.user, votetype)
+            if vote is None:
                 return Response({'detail': _("Already voted.")}, status=status.HTTP_400_BAD_REQUEST)
-            vote = current_seeking.votes.create(
-                activity_type=votetype, user=request.user)
             serializer = VoteSerializer(
                 vote, many=False, context={'request': request})
             return Response(serializer.data)
@@ -206,11 +212,11 @@ class SeekingPromotionViewSet(viewsets.ReadOnlyModelViewSet):
             # do not change queryset if there are no seekings with tags
             condition2.add(Q(seeking__tags__name__in=tags), Q.OR)
 
-        if query:
-            # filter seeking title
+        search_query = build_search_query(query) if query else None
+        if search_query is not None:
+            # filter seeking title & description (full text search)
             # do not change queryset if there are no seekings with similar title
-            condition2.add(Q(seeking__title__icontains=query), Q.OR)
-            condition2.add(Q(seeking__description__icontains=query), Q.OR)
+            condition2.add(Q(seeking__search_vector=search_query), Q.OR)
             condition2.add(Q(seeking__tags__name__iexact=query), Q.OR)
 
         if location_id:
@@ -221,15 +227,14 @@ class SeekingPromotionViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset.filter(condition)
 
     def list(self, request):
-        """Custom list processing"""
-        queryset = self.filter_promotion_queryset(
-            self.queryset, request).distinct('id')
-        # [:6]
+        """Custom list processing (random promotions, weighted by plan)"""
+        pool = get_promotion_pool(
+            SeekingPromotion.POOL_NAME, get_filters_key(request),
+            lambda: self.filter_promotion_queryset(self.queryset, request).distinct('id'))
 
-        valid_id_list = list(queryset.values_list('id', flat=True))
-        random_id_list = random.sample(
-            valid_id_list, min(len(valid_id_list), self.PAGE_SIZE))
-        queryset = self.queryset.filter(id__in=random_id_list)[:self.PAGE_SIZE]
+        random_id_list = weighted_sample(pool, self.PAGE_SIZE)
+        queryset = self.queryset.filter(
+            id__in=random_id_list, seeking__promoted_til__gte=timezone.now())
 
         serializer = self.serializer_class(
             queryset, many=True, context={'request': request})
@@ -237,7 +242,7 @@ class SeekingPromotionViewSet(viewsets.ReadOnlyModelViewSet):
         return Response({
             'next': None,
             'previous': None,
-            'count': 5,
+            'count': len(pool),
             'pages': 1,
             'page': 1,
             'results': serializer.data
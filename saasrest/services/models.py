@@ -1,19 +1,23 @@
 from colorfield.fields import ColorField
 from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.postgres.fields import ArrayField, JSONField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
-from django.db.models.signals import post_delete
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.timezone import now
 
-from authentication.models import User
+from authentication.models import User, update_users_counter
 from categories.models import Category
 # pylint: disable=fixme, import-error
 from djmoney.models.fields import MoneyField
 from locations.models import Location
 from saas_core.images_compression import compress_image
+from saas_core.promotions import invalidate_promotion_pools
+from saas_core.search import update_search_vector
 from tags.models import Tag
 from votes.models import Vote
 
@@ -49,11 +53,30 @@ class Service(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     score = models.IntegerField(default=0)
+    # time decayed score, see saas_core.ranking
+    hot_score = models.FloatField(default=0)
+    # denormalized vote counters, maintained by votes signals
+    up_votes_count = models.IntegerField(default=0)
+    down_votes_count = models.IntegerField(default=0)
+    favorites_count = models.IntegerField(default=0)
     votes = GenericRelation(Vote)
     images = GenericRelation(Image)
 
     promoted_til = models.DateTimeField(null=True, blank=True)
 
+    # full text search document, see `update_service_search_vector`
+    search_vector = SearchVectorField(null=True, editable=False)
+    SEARCH_FIELDS = (('title', 'A'), ('description', 'B'))
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector']),
+            # keyset pagination
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['-score', '-id']),
+            models.Index(fields=['-hot_score', '-id']),
+        ]
+
     def likes(self):
         return self.votes.filter(activity_type=Vote.UP_VOTE)
 
@@ -77,7 +100,7 @@ class Service(models.Model):
     def get_absolute_url(self):
         return reverse('service-detail', args=[str(self.id)])
 
-    def promote(self, user, intent_id, days):
+    def promote(self, user, intent_id, days, weight=1):
         logger.info('Trying to promote service #{}, intent_id: {}'.format(self.pk, intent_id))
 
         current_datetime = timezone.now()
@@ -88,6 +111,7 @@ class Service(models.Model):
             countdown_datetime = service_promotion.end_datetime if service_promotion.end_datetime > current_datetime else current_datetime
             service_promotion.end_datetime = countdown_datetime + \
                 timezone.timedelta(days=days)
+            service_promotion.weight = max(service_promotion.weight, weight)
 
             if intent_id:
                 service_promotion.stripe_payment_intents.append(intent_id)
@@ -105,7 +129,8 @@ class Service(models.Model):
                 service_promotion = ServicePromotion.objects.create(
                     author=user, service=self,
                     stripe_payment_intents=[intent_id],
-                    end_datetime=end_datetime)
+                    end_datetime=end_datetime,
+                    weight=weight)
             except Exception as e:
                 logger.error(str(e))
             else:
@@ -120,10 +145,28 @@ class Service(models.Model):
         else:
             logger.info("Successfully changed promoted_til field")
 
+        invalidate_promotion_pools(ServicePromotion.POOL_NAME)
         logger.info("Successfully promoted service #{} til {}".format(self.pk, str(self.promoted_til)))
         return service_promotion
 
 
+@receiver(post_save, sender=Service, dispatch_uid='service_author_counter_post_save_signal')
+def increment_author_services_count(sender, instance, created, **kwargs):
+    if created:
+        update_users_counter([instance.author_id], 'services_count', 1)
+
+
+@receiver(post_delete, sender=Service, dispatch_uid='service_author_counter_post_delete_signal')
+def decrement_author_services_count(sender, instance, **kwargs):
+    update_users_counter([instance.author_id], 'services_count', -1)
+
+
+@receiver(post_save, sender=Service, dispatch_uid='service_search_vector_signal')
+def update_service_search_vector(sender, instance, update_fields=None, **kwargs):
+    """Keep search vector up to date"""
+    update_search_vector(instance, Service.SEARCH_FIELDS, update_fields)
+
+
 class ServicePromotion(models.Model):
     """Service promotion"""
     author = models.ForeignKey(User, on_delete=models.SET_NULL,
@@ -135,6 +178,9 @@ class ServicePromotion(models.Model):
 
     stripe_payment_intents = ArrayField(models.CharField(max_length=110))
 
+    # rotation weight (depends on payment plan)
+    weight = models.PositiveSmallIntegerField(default=1)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -142,3 +188,5 @@ class ServicePromotion(models.Model):
     def is_valid(self):
         """is valid promotion"""
         return self.end_datetime > now()
+
+    POOL_NAME = 'SERVICE_PROMOTIONS'
@@ -4,19 +4,22 @@ from rest_framework import serializers
 
 from authentication.serializers import serialize_simple_user
 from categories.models import Category
-from locations.serializers import LocationSerializer
-from saas_core.serializers import CreatableSlugRelatedField
-from saas_core.utils import cached_or_new
+from locations.serializers import serialize_location
+from saas_core.reference import CATEGORIES, TAGS
+from saas_core.serializers import CreatableSlugRelatedField, ReferenceSlugRelatedField
 from tags.models import Tag
 from votes.serializers import VoteSerializer
 
 from .models import Service, ServicePromotion
 
 from saas_core.models import Image
-from saas_core.serializers import ImageSerializer
+from saas_core.serializers import (CachedRepresentationListSerializer, ImageSerializer,
+                                   UserOverlayMixin)
 
-class ServiceSerializer(serializers.HyperlinkedModelSerializer):
+class ServiceSerializer(UserOverlayMixin, serializers.HyperlinkedModelSerializer):
     """Service serializer"""
+    representation_cache_models = ('saas_core.image', 'tags.tag', 'categories.category', 'locations.location')
+
     images = ImageSerializer(
         many=True,
         read_only=True)
@@ -27,21 +30,24 @@ class ServiceSerializer(serializers.HyperlinkedModelSerializer):
     tags = CreatableSlugRelatedField(
         many=True,
         queryset=Tag.objects,
-        slug_field='name'
+        slug_field='name',
+        reference_cache=TAGS
     )
 
-    category = serializers.SlugRelatedField(
+    category = ReferenceSlugRelatedField(
         many=False,
         queryset=Category.objects,
-        slug_field='name'
+        slug_field='name',
+        reference_cache=CATEGORIES
     )
 
     current_user_vote = serializers.SerializerMethodField()
+    is_owner = serializers.SerializerMethodField()
 
     def get_current_user_vote(self, instance):
         """Current user vote on serialization"""
         user = self.get_current_user()
-        if not user or user.is_anonymous:
+        if not user or user.is_anonymous or self.skip_user_fields():
             return None
 
         if not isinstance(self.instance, list):
@@ -72,6 +78,7 @@ class ServiceSerializer(serializers.HyperlinkedModelSerializer):
 
     class Meta:
         model = Service
+        list_serializer_class = CachedRepresentationListSerializer
         fields = ('id', 'url', 'author', 'title', 'description', 'price', 'price_currency',
                   'contact_phone', 'contact_email', 'color', 'location',
                   'images',
@@ -81,11 +88,13 @@ class ServiceSerializer(serializers.HyperlinkedModelSerializer):
                   'tags', 'category', \
                   # 'promotions', \
                   # 'likes', 'dislikes', \
-                  'score', 'current_user_vote', 'price_details')
+                  'score', 'up_votes_count', 'down_votes_count', 'favorites_count',
+                  'current_user_vote', 'is_owner', 'price_details')
         read_only_fields = ('id', 'url', 'created_at', 'updated_at', 'author',
                             'images', 'promotions',
                             # 'likes', 'dislikes', \
-                            'score', 'current_user_vote')
+                            'score', 'up_votes_count', 'down_votes_count', 'favorites_count',
+                            'current_user_vote', 'is_owner')
         required_fields = ('title', 'description', 'price',
                            'price_currency', 'location')
         extra_kwargs = {field: {'required': True} for field in required_fields}
@@ -134,8 +143,7 @@ class ServiceSerializer(serializers.HyperlinkedModelSerializer):
                     user_id=instance.author_id, many=False, context=self.context)
 
             response['tags'] = [{'name': tag.name, 'color': tag.color} for tag in instance.tags.all()]
-            response['location'] = cached_or_new('SERIALIZED_LOCATION_{}'.format(
-                instance.location_id), LocationSerializer, instance, 'location', self.context)
+            response['location'] = serialize_location(instance.location_id, self.context)
 
         return response
 
@@ -147,8 +155,7 @@ class ShortServiceSerializer(ServiceSerializer):
         response = super().to_representation(instance, False)
         if self.context['request']:
             response['tags'] = [{'name': tag.name, 'color': tag.color} for tag in instance.tags.all()]
-            response['location'] = cached_or_new('SERIALIZED_LOCATION_{}'.format(
-                instance.location_id), LocationSerializer, instance, 'location', self.context)
+            response['location'] = serialize_location(instance.location_id, self.context)
         return response
 
 
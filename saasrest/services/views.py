@@ -12,22 +12,27 @@ from categories.models import Category
 from tags.models import Tag
 from votes.models import Vote
 from votes.serializers import VoteSerializer
+from votes.utils import create_vote
 
 from .models import Service, ServicePromotion
 from .permissions import IsOwnerOrReadOnly
 from saas_core.permissions import IsAuthenticatedAndVerified
+from saas_core.promotions import get_filters_key, get_promotion_pool, weighted_sample
+from saas_core.search import FullTextSearchFilter, build_search_query
 from .serializers import (ServicePromotionSerializer,
                           ServiceSerializer)
 
-import random
-
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
 from django.views.decorators.vary import vary_on_cookie
 
 from django.utils.translation import ugettext as _
 
+from saas_core.cache import SERVICES_MODELS, cache_response, refresh_authors, until_promotion_ends
 from saas_core.config import DEFAULT_PERMISSION_CLASSES
+from locations.geo import NearLocationFilter
+from saas_core.paginations import KeysetPagination
+from saas_core.ranking import HotOrderingFilter
 
 class ServiceFilter(django_rest_filters.FilterSet):
     """Custom filter for services"""
@@ -79,25 +84,27 @@ class ServiceViewSet(viewsets.ModelViewSet):
     """
     queryset = Service.objects\
         .prefetch_related('tags').prefetch_related('images')\
-        .select_related('category').select_related('location')\
+        .select_related('category')\
         .order_by('-created_at')
     serializer_class = ServiceSerializer
 
     permission_classes = DEFAULT_PERMISSION_CLASSES + [IsOwnerOrReadOnly, ]
 
-    filter_backends = (filters.SearchFilter,
+    filter_backends = (FullTextSearchFilter,
                        django_rest_filters.DjangoFilterBackend,
-                       filters.OrderingFilter)
-    ordering_fields = ('price', 'created_at', 'score')
+                       HotOrderingFilter,
+                       NearLocationFilter)
+    ordering_fields = ('price', 'created_at', 'score', 'hot_score')
     search_fields = ('title', 'description',)
+    search_vector_field = 'search_vector'
     filter_class = ServiceFilter
+    pagination_class = KeysetPagination
 
-    # one minute cache
-    # @method_decorator(cache_page(60*1))
-    # @method_decorator(vary_on_cookie)
-    # def dispatch(self, *args, **kwargs):
-    #     return super(self.__class__, self).dispatch(*args, **kwargs)
+    @cache_response(*SERVICES_MODELS, timeout=until_promotion_ends, refresh=refresh_authors)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
+    @cache_response(*SERVICES_MODELS, timeout=until_promotion_ends, refresh=refresh_authors)
     def list(self, request, *args, **kwargs):
         """
         Custom list processing, exclude promoted services
@@ -133,10 +140,9 @@ class ServiceViewSet(viewsets.ModelViewSet):
     def vote(self, request, pk, votetype):
         if self.request.user:
             current_service = self.get_object()
-            if current_service.votes.filter(user=self.request.user).exists():
+            vote = create_vote(current_service, request.user, votetype)
+            if vote is None:
                 return Response({'detail': _("Already voted.")}, status=status.HTTP_400_BAD_REQUEST)
-            vote = current_service.votes.create(
-                activity_type=votetype, user=request.user)
             serializer = VoteSerializer(
                 vote, many=False, context={'request': request})
             return Response(serializer.data)
@@ -210,11 +216,11 @@ class ServicePromotionViewSet(viewsets.ReadOnlyModelViewSet):
             # do not change queryset if there are no services with tags
             condition2.add(Q(service__tags__name__in=tags), Q.OR)
 
-        if query:
-            # filter service title
+        search_query = build_search_query(query) if query else None
+        if search_query is not None:
+            # filter service title & description (full text search)
             # do not change queryset if there are no services with similar title
-            condition2.add(Q(service__title__icontains=query), Q.OR)
-            condition2.add(Q(service__description__icontains=query), Q.OR)
+            condition2.add(Q(service__search_vector=search_query), Q.OR)
             condition2.add(Q(service__tags__name__iexact=query), Q.OR)
 
         if location_id:
@@ -225,13 +231,14 @@ class ServicePromotionViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset.filter(condition)
 
     def list(self, request):
-        """Custom list processing"""
-        queryset = self.filter_promotion_queryset(self.queryset, request).distinct('id')
-        # [:6]
+        """Custom list processing (random promotions, weighted by plan)"""
+        pool = get_promotion_pool(
+            ServicePromotion.POOL_NAME, get_filters_key(request),
+            lambda: self.filter_promotion_queryset(self.queryset, request).distinct('id'))
 
-        valid_id_list = list(queryset.values_list('id', flat=True))
-        random_id_list = random.sample(valid_id_list, min(len(valid_id_list), self.PAGE_SIZE))
-        queryset = self.queryset.filter(id__in=random_id_list)[:self.PAGE_SIZE]
+        random_id_list = weighted_sample(pool, self.PAGE_SIZE)
+        queryset = self.queryset.filter(
+            id__in=random_id_list, service__promoted_til__gte=timezone.now())
 
         serializer = self.serializer_class(
             queryset, many=True, context={'request': request})
@@ -239,8 +246,25 @@ class ServicePromotionViewSet(viewsets.ReadOnlyModelViewSet):
         return Response({
             'next': None,
             'previous': None,
-            'count': 5,
+            'count': len(pool),
             'pages': 1,
             'page': 1,
             'results': serializer.data
         })
+
+    # read only, promotions of current user (not part of user representation)
+    @action(detail=False, methods=['get'])
+    def my(self, request):
+        if request.user.is_authenticated:
+            queryset = self.queryset.filter(author=request.user).order_by('-id')
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                serializer = self.serializer_class(
+                    page, many=True, context={'request': request})
+                return self.get_paginated_response(serializer.data)
+
+            serializer = self.serializer_class(
+                queryset, many=True, context={'request': request})
+            return Response(serializer.data)
+        else:
+            raise PermissionDenied()
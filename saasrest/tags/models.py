@@ -34,6 +34,15 @@ class Tag(models.Model):
     name = LowerTextField(max_length=20, blank=False,
                           null=False, unique=True)
     color = ColorField(max_length=10, default=random_color)
+    # services + seekings + feed posts, recounted by tags.tasks.update_usage_counts
+    usage_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # prefix (LIKE 'abc%') lookups of autocomplete
+            models.Index(fields=['name'], name='tag_name_prefix_idx',
+                         opclasses=['text_pattern_ops']),
+        ]
 
     def __str__(self):
         return 'Tag[id: {id}, name: {name}]'.format(id=self.id, name=self.name)
@@ -9,8 +9,8 @@ class TagSerializer(serializers.HyperlinkedModelSerializer):
     """Tag serializer"""
     class Meta:
         model = Tag
-        fields = ('name', 'color')
-        read_only_fields = ('color', )
+        fields = ('name', 'color', 'usage_count')
+        read_only_fields = ('color', 'usage_count')
         required_fields = ('name', )
         extra_kwargs = {field: {'required': True} for field in required_fields}
 
@@ -0,0 +1,44 @@
+"""Tags tasks"""
+import logging
+from functools import reduce
+from operator import add
+
+from celery import shared_task
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from saas_core.cache import TAG_USAGE, bump_model_version
+
+from .models import Tag
+
+logger = logging.getLogger(__name__)
+
+# reverse m2m relations counted as tag usage
+USAGE_RELATIONS = ('services', 'seekings', 'feed_posts')
+
+
+def count_usage(related_name):
+    """Subquery counting rows of the m2m through table of a tag"""
+    through = getattr(Tag, related_name).through
+    count = through.objects.filter(tag_id=OuterRef('pk')).order_by() \
+        .values('tag_id').annotate(count=Count('*')).values('count')
+    return Coalesce(Subquery(count, output_field=IntegerField()), 0)
+
+
+@shared_task
+def update_usage_counts():
+    """Recount tags usage (autocomplete ranking), writes only changed rows"""
+    usage = reduce(add, (count_usage(related_name) for related_name in USAGE_RELATIONS))
+    tags = list(Tag.objects.annotate(usage=usage).exclude(usage_count=F('usage'))
+                .only('pk', 'usage_count'))
+    if not tags:
+        return 0
+
+    for tag in tags:
+        tag.usage_count = tag.usage
+    Tag.objects.bulk_update(tags, ['usage_count'], batch_size=1000)
+    # only tag endpoints show usage, listings and item caches keep their generation
+    bump_model_version(TAG_USAGE)
+
+    logger.info('Updated usage counts of {} tags'.format(len(tags)))
+    return len(tags)
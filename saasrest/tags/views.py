@@ -12,8 +12,11 @@ from rest_framework.response import Response
 from .models import Tag
 from .serializers import TagSerializer
 
+from saas_core.cache import TAGS_MODELS, cache_response
 from saas_core.config import DEFAULT_PERMISSION_CLASSES
 
+AUTOCOMPLETE_LIMIT = 10
+
 # pylint: disable=too-many-ancestors
 class TagViewSet(viewsets.ModelViewSet):
     """
@@ -26,9 +29,13 @@ class TagViewSet(viewsets.ModelViewSet):
                        django_rest_filters.DjangoFilterBackend, )
     search_fields = ('name', )
 
-    # @method_decorator(cache_page(60*1))
-    # def dispatch(self, request, *args, **kwargs):
-    #     return super(TagViewSet, self).dispatch(request, *args, **kwargs)
+    @cache_response(*TAGS_MODELS, anonymous_only=False)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response(*TAGS_MODELS, anonymous_only=False)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         if self.request.user:
@@ -37,6 +44,7 @@ class TagViewSet(viewsets.ModelViewSet):
             raise PermissionDenied()
 
     @action(detail=False, methods=['get'], url_path='name/(?P<tag_name>[^/]+)')
+    @cache_response(*TAGS_MODELS, anonymous_only=False)
     def get_tag_by_name(self, request, tag_name):
         """
         Endpoint for getting a tag by name (.../name/<tag name>)
@@ -49,3 +57,20 @@ class TagViewSet(viewsets.ModelViewSet):
         serializer = self.serializer_class(
             tag, many=False, context={'request': request})
         return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    @cache_response(*TAGS_MODELS, anonymous_only=False)
+    def autocomplete(self, request):
+        """
+        Most used tags starting with ?q= (.../autocomplete?q=<prefix>)
+        """
+        prefix = request.query_params.get('q', '').strip().lower()
+        if not prefix:
+            return Response([])
+
+        # range scan of tag_name_prefix_idx
+        tags = Tag.objects.filter(name__startswith=prefix) \
+            .order_by('-usage_count', 'name')[:AUTOCOMPLETE_LIMIT]
+        serializer = self.serializer_class(
+            tags, many=True, context={'request': request})
+        return Response(serializer.data)
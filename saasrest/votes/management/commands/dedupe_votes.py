@@ -0,0 +1,29 @@
+"""Remove duplicate votes before `unique_user_vote` constraint is migrated"""
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from votes.models import Vote
+
+# raw SQL: runs before migrate, so model columns may not exist yet,
+# and delete signals must not touch counters (reconcile_vote_counters fixes them)
+DELETE_DUPLICATES_SQL = '''
+    DELETE FROM {table} duplicate USING {table} earliest
+    WHERE duplicate.user_id = earliest.user_id
+      AND duplicate.content_type_id = earliest.content_type_id
+      AND duplicate.object_id = earliest.object_id
+      AND duplicate.id > earliest.id
+'''
+
+
+class Command(BaseCommand):
+    help = 'Deletes duplicate votes of a user on an object, keeps the earliest one'
+
+    def handle(self, *args, **options):
+        table = Vote._meta.db_table
+        if table not in connection.introspection.table_names():
+            self.stdout.write('{} does not exist yet'.format(table))
+            return
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(DELETE_DUPLICATES_SQL.format(table=connection.ops.quote_name(table)))
+            deleted = cursor.rowcount
+        self.stdout.write('{} duplicate votes deleted'.format(deleted))
@@ -0,0 +1,58 @@
+"""Reconcile denormalized vote counters with votes table"""
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+from saas_core.ranking import refresh_hot_scores
+from votes.models import Vote
+
+VOTABLE_MODELS = ('services.Service', 'seeks.Seeking', 'feed.FeedPost')
+COUNTER_FIELDS = ('up_votes_count', 'down_votes_count', 'favorites_count', 'score')
+
+
+def get_vote_counters(model):
+    """{object_id: {counter field: value}} computed from votes"""
+    content_type = ContentType.objects.get_for_model(model)
+    rows = Vote.objects.filter(content_type=content_type)\
+        .values('object_id')\
+        .annotate(up_votes_count=Count('id', filter=Q(activity_type=Vote.UP_VOTE)),
+                  down_votes_count=Count('id', filter=Q(activity_type=Vote.DOWN_VOTE)),
+                  favorites_count=Count('id', filter=Q(activity_type=Vote.FAVORITE)))\
+        .order_by()
+    counters = {}
+    for row in rows:
+        row['score'] = row['up_votes_count'] - row['down_votes_count']
+        counters[row.pop('object_id')] = row
+    return counters
+
+
+class Command(BaseCommand):
+    help = 'Recounts vote counters and score of votable objects'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        empty = {field: 0 for field in COUNTER_FIELDS}
+        for label in VOTABLE_MODELS:
+            model = apps.get_model(label)
+            counters = get_vote_counters(model)
+
+            changed = []
+            for obj in model.objects.only('pk', *COUNTER_FIELDS).iterator():
+                expected = counters.get(obj.pk, empty)
+                if any(getattr(obj, field) != expected[field] for field in COUNTER_FIELDS):
+                    for field in COUNTER_FIELDS:
+                        setattr(obj, field, expected[field])
+                    changed.append(obj)
+
+            with transaction.atomic():
+                model.objects.bulk_update(
+                    changed, COUNTER_FIELDS, batch_size=options['batch_size'])
+            self.stdout.write('{}: {} rows fixed'.format(model.__name__, len(changed)))
+
+        # scores may have changed, also ranks rows added before hot_score
+        for label, updated in refresh_hot_scores().items():
+            self.stdout.write('{}: {} hot scores refreshed'.format(label, updated))
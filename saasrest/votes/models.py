@@ -2,10 +2,12 @@
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.db.models import F
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from authentication.models import User
+from saas_core.ranking import HotScore
 
 
 class Vote(models.Model):
@@ -25,33 +27,53 @@ class Vote(models.Model):
     date = models.DateTimeField(auto_now_add=True)
 
     # Below the mandatory fields for generic relation
-    # REQUIREMENT: object have to provide likes & dislikes properties
+    # REQUIREMENT: object have to provide score, hot_score and *_count counter fields
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey()
 
+    # object counter field per activity type
+    COUNTER_FIELDS = {
+        FAVORITE: 'favorites_count',
+        UP_VOTE: 'up_votes_count',
+        DOWN_VOTE: 'down_votes_count',
+    }
+    SCORE_DELTAS = {
+        UP_VOTE: 1,
+        DOWN_VOTE: -1,
+    }
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'content_type', 'object_id'], name='unique_user_vote'),
+        ]
+        indexes = [models.Index(fields=['content_type', 'object_id'])]
+
+
+def apply_vote(vote, sign):
+    """Atomically add (sign=1) or remove (sign=-1) vote from object counters"""
+    model = vote.content_type.model_class()
+    if model is None:
+        return
+    counter_field = Vote.COUNTER_FIELDS[vote.activity_type]
+    changes = {counter_field: F(counter_field) + sign}
+    score_delta = Vote.SCORE_DELTAS.get(vote.activity_type)
+    if score_delta:
+        changes['score'] = F('score') + score_delta * sign
+        # same statement, so concurrent votes can't leave a stale hot score
+        changes['hot_score'] = HotScore(score=changes['score'])
+    model.objects.filter(pk=vote.object_id).update(**changes)
+
 
 @receiver(post_save, sender=Vote, dispatch_uid='vote_post_save_signal')
 def update_obj_score(sender, instance, created, **kwargs):
-    """
-    Update object score on vote creation
-
-    Object required to have likes & dislikes properties
-    """
+    """Update object counters on vote creation"""
     if created:
-        obj = instance.content_object
-        obj.score = obj.likes().count() - obj.dislikes().count()
-        obj.save(update_fields=['score'])
+        apply_vote(instance, 1)
 
 
 @receiver(post_delete, sender=Vote, dispatch_uid='vote_pre_delete_signal')
 def change_obj_score(sender, instance, using, **kwargs):
-    """
-    Update object score on vote delete
-
-    Object required to have likes & dislikes properties
-    """
-    obj = instance.content_object
-    if obj:
-        obj.score = obj.likes().count() - obj.dislikes().count()
-        obj.save(update_fields=['score'])
+    """Update object counters on vote delete"""
+    apply_vote(instance, -1)
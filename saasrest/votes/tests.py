@@ -1,3 +1,59 @@
 from django.test import TestCase
 
-# Create your tests here.
+from authentication.models import User
+from services.models import Service
+
+from .management.commands.reconcile_vote_counters import COUNTER_FIELDS, get_vote_counters
+from .models import Vote
+from .utils import create_vote
+
+
+class VoteCountersTest(TestCase):
+    """Counters updated by vote signals have to equal a recount"""
+
+    def setUp(self):
+        self.author = User.objects.create_user('author@example.com', 'password')
+        self.user = User.objects.create_user('voter@example.com', 'password')
+        self.service = Service.objects.create(author=self.author, title='Service', price=10)
+
+    def assertCountersMatchRecount(self, **expected):
+        self.service.refresh_from_db()
+        recount = get_vote_counters(Service).get(
+            self.service.pk, {field: 0 for field in COUNTER_FIELDS})
+        for field in COUNTER_FIELDS:
+            self.assertEqual(getattr(self.service, field), recount[field], field)
+        for field, value in expected.items():
+            self.assertEqual(getattr(self.service, field), value, field)
+
+    def switch_vote(self, vote, activity_type):
+        # votes are read only, switching is delete + vote
+        vote.delete()
+        return create_vote(self.service, self.user, activity_type)
+
+    def test_up_vote(self):
+        create_vote(self.service, self.user, Vote.UP_VOTE)
+        self.assertCountersMatchRecount(score=1, up_votes_count=1, down_votes_count=0)
+
+    def test_up_to_down(self):
+        vote = create_vote(self.service, self.user, Vote.UP_VOTE)
+        self.switch_vote(vote, Vote.DOWN_VOTE)
+        self.assertCountersMatchRecount(score=-1, up_votes_count=0, down_votes_count=1)
+
+    def test_down_to_up(self):
+        vote = create_vote(self.service, self.user, Vote.DOWN_VOTE)
+        self.switch_vote(vote, Vote.UP_VOTE)
+        self.assertCountersMatchRecount(score=1, up_votes_count=1, down_votes_count=0)
+
+    def test_repeated_vote(self):
+        self.assertIsNotNone(create_vote(self.service, self.user, Vote.UP_VOTE))
+        # unique_user_vote, IntegrityError is mapped to None
+        self.assertIsNone(create_vote(self.service, self.user, Vote.UP_VOTE))
+        self.assertIsNone(create_vote(self.service, self.user, Vote.DOWN_VOTE))
+        self.assertEqual(Vote.objects.filter(user=self.user).count(), 1)
+        self.assertCountersMatchRecount(score=1, up_votes_count=1, down_votes_count=0)
+
+    def test_deleted_vote(self):
+        create_vote(self.service, self.author, Vote.UP_VOTE)
+        vote = create_vote(self.service, self.user, Vote.UP_VOTE)
+        vote.delete()
+        self.assertCountersMatchRecount(score=1, up_votes_count=1, down_votes_count=0)
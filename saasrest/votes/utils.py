@@ -0,0 +1,15 @@
+"""Votes utils"""
+from django.db import IntegrityError, transaction
+
+
+def create_vote(obj, user, activity_type):
+    """
+    Vote for an object
+
+    Returns None if user has already voted for it (unique constraint)
+    """
+    try:
+        with transaction.atomic():
+            return obj.votes.create(activity_type=activity_type, user=user)
+    except IntegrityError:
+        return None